@@ -1,256 +1,4475 @@
 from bakery import assert_equal
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from drafter import *
+from collections import OrderedDict
+from functools import lru_cache, wraps
+import argparse
+import array
+import asyncio
+import collections
+import concurrent.futures
+import csv
+import decimal
+import hashlib
+import hmac
+import html
+import http.client
+import inspect
+import io
+import json
+import math
+import mmap
+import multiprocessing
+import operator
+import os
+import platform
+import random
+import re
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import tracemalloc
+import urllib.parse
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from PIL import Image as PillowImage
+except ImportError:
+    PillowImage = None
+
+# Exponents whose answers are at most this many bits are computed right away on the request
+INLINE_POWER_BITS = 1 << 19
+# Exponents whose answers would be bigger than this many bits are refused without computing
+MAX_POWER_BITS = 1 << 24
+# Limits for each exponent job that is sent to a worker process
+POWER_TIMEOUT_SECONDS = 10
+POWER_CPU_SECONDS = 10
+POWER_MEMORY_BYTES = 1 << 30
+POWER_WORKERS = 2
+# Math problems whose numbers have more digits than this in total are read and worked out
+# in a worker process, so that they do not hold up the rest of the server
+WORKER_INPUT_DIGITS = 50000
+# Answers worked out in a worker process with more bits than this stay in the worker, and
+# only their preview is sent back, since bringing a huge number back holds up the server
+WORKER_ANSWER_BITS = 1 << 19
+# Modular powers are much slower per digit, so they go to a worker process above this
+MODULAR_POWER_INLINE_DIGITS = 300
+
+# Answers with more digits than this are shown as a preview with a button to see them in full
+FULL_ANSWER_DIGITS = 1000
+# How many leading and trailing digits are shown in the preview of a long answer
+PREVIEW_DIGITS = 20
+# How many digits are shown on each part of the full answer page
+ANSWER_PART_DIGITS = 10000
+# How many long answers are kept for the full answer page
+FULL_ANSWER_SLOTS = 16
+# Numbers this small are converted to and from text by Python directly
+SMALL_NUMBER_BITS = 3000
+SMALL_NUMBER_DIGITS = 900
+# Most memory, in bytes, that remembered answers may take up
+RESULT_CACHE_BYTES = 64 << 20
+# Whether routes record how often they are visited and how long they take
+METRICS_ENABLED = True
+# Upper bounds, in seconds, of the buckets that request and stage times are counted in
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1, 2.5, 5, 10)
+# Longest math problem that can be typed in, and how many compiled problems are remembered
+MAX_EXPRESSION_LENGTH = 10000
+EXPRESSION_CACHE_SIZE = 1024
+# How long primality tests and factoring may run before giving back what they found so far
+NUMBER_THEORY_SECONDS = 2
+# Primality tests of numbers with more bits than this run in a worker process, and so does
+# factoring whatever such a number has left once its small primes are divided out. Smaller
+# numbers are factored right here for at most NUMBER_THEORY_INLINE_SECONDS first, since
+# starting a worker process takes far longer than most of them need
+NUMBER_THEORY_INLINE_BITS = 256
+NUMBER_THEORY_INLINE_SECONDS = 0.05
+# Extra time a number theory worker gets past its deadline to send back what it found
+NUMBER_THEORY_GRACE_SECONDS = 0.25
+# Most rounds of the Miller-Rabin test for numbers too big to test with fixed bases
+PRIME_TEST_ROUNDS = 40
+# Most significant digits exact division can be asked for, and how many extra leading
+# digits of each number it starts with before reading more of them
+MAX_DIVISION_DIGITS = 1000
+DIVISION_GUARD_DIGITS = 10
+# Combinations are built from the primes up to n only when n is at most this big and r
+# is at least this fraction of n, since the sieve takes memory and time for every number
+# up to n
+COMBINATIONS_SIEVE_LIMIT = 10 ** 7
+COMBINATIONS_SIEVE_FRACTION = 8
+# Fractions whose numbers have more bits than this are reduced in a worker process
+EXACT_FRACTION_INLINE_BITS = 1 << 16
+# Folder, next to this file, that the optimized copies of the images are written to
+ASSET_DIRECTORY = "assets"
+# How long browsers may keep an image, since its URL changes whenever its content does
+ASSET_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+WEBP_QUALITY = 90
+# How many past answers are kept in the answer history, and how many are shown per page
+HISTORY_CAPACITY = 1000
+HISTORY_PAGE_SIZE = 50
+# Folder, next to this file, that every session's answer history is saved in, or "" to
+# keep histories in memory only
+HISTORY_DIRECTORY = "history"
+# Whether every saved answer is forced onto the disk before the page is shown, which also
+# protects it from power cuts but makes every answer slower
+HISTORY_FSYNC = False
+# How many bytes each position in a history's index file takes
+HISTORY_INDEX_BYTES = 8
+# Saved histories are deleted once no answer has been added to them for this many seconds,
+# and the oldest are deleted when more than this many are saved. The history folder is
+# checked at most once every HISTORY_CLEANUP_SECONDS
+HISTORY_RETENTION_SECONDS = 30 * 24 * 60 * 60
+HISTORY_MAX_SAVED = 10000
+HISTORY_CLEANUP_SECONDS = 60 * 60
+# Sessions are forgotten after this many seconds without a visit, or when there are too
+# many of them or they take up too much memory, least recently used first
+SESSION_IDLE_SECONDS = 30 * 60
+SESSION_LIMIT = 1000
+SESSION_MEMORY_BYTES = 64 << 20
+# How many heavy requests the serve command works on at once, and how many more may wait
+# before new ones are told the server is busy
+SERVE_HEAVY_WORKERS = 2
+SERVE_HEAVY_QUEUE = 16
+# How many threads answer cheap requests, which may still wait on the disk to save answers
+SERVE_CHEAP_WORKERS = 4
+# Requests are heavy when their inputs are longer than this many characters in total, or
+# when their answer is predicted to have more than this many bits
+CHEAP_INPUT_CHARACTERS = 2000
+CHEAP_ANSWER_BITS = 1 << 16
+# Routes that are always heavy, since they can run for seconds whatever their inputs are
+HEAVY_ROUTES = {"expression_page", "modular_power_page", "prime_page", "factor_page", "full_answer"}
+# Largest request body the serve command reads, in bytes
+MAX_REQUEST_BYTES = 8 << 20
+# Load test: how many simulated users each step runs, how long each step lasts, how often
+# users type invalid input or look at their history, and when a step counts as failing
+LOADTEST_USERS = "1,5,10,25,50"
+LOADTEST_STEP_SECONDS = 10
+LOADTEST_INVALID_RATE = 0.1
+LOADTEST_HISTORY_RATE = 0.2
+LOADTEST_TIMEOUT_SECONDS = 30
+LOADTEST_ERROR_LIMIT = 0.01
+LOADTEST_P99_LIMIT_SECONDS = 1.0
+LOADTEST_RSS_INTERVAL_SECONDS = 0.5
+# How many rows each batch worker evaluates at a time
+BATCH_CHUNK_ROWS = 256
+# A benchmark is a regression when it is this much slower, or uses this much more memory,
+# than the baseline
+BENCHMARK_TOLERANCE = 0.25
+# Numbers with at most this many digits always fit in a 64-bit integer
+INT64_DIGITS = 18
+INT64_MAX = 2 ** 63 - 1
+# Whole numbers up to this size are exactly the same as floats
+EXACT_FLOAT_MAX = 2 ** 53
+
+power_jobs = set()
+in_power_worker = False
+power_jobs_lock = threading.Lock()
+power_job_slots = threading.BoundedSemaphore(POWER_WORKERS)
+full_answers = OrderedDict()
+
+class HistoryLog:
+    """
+    Saves every answer of a history in files on disk, so the history survives restarts
+    and does not have to be kept in memory. Each answer is written as one line of JSON at
+    the end of the .log file, and the position where that line ends is written as an
+    8-byte number at the end of the .idx file. Nothing is ever rewritten, and any answer
+    can be found by reading its position from a memory map of the index instead of reading
+    the answers before it. If a crash cuts off an answer while it is being saved, the
+    half-written line is removed the next time the history is opened, and a whole line
+    that was not indexed yet is indexed then. It is safe to use from several threads.
+    """
+    
+    def __init__(self, path: str):
+        self.log_path = path + ".log"
+        self.index_path = path + ".idx"
+        self.count = 0
+        self.log_size = 0
+        self.lock = threading.Lock()
+        self.recover()
+    
+    def recover(self):
+        """
+        Finds how many answers are saved and repairs the files after a crash, reading only
+        the end of the log that has no index positions yet.
+        """
+        if not os.path.exists(self.log_path):
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            return
+        log_size = os.path.getsize(self.log_path)
+        with io.open(self.index_path, "a+b") as index, io.open(self.log_path, "r+b") as log:
+            count = os.fstat(index.fileno()).st_size // HISTORY_INDEX_BYTES
+            while count > 0 and self.read_end(index, count - 1) > log_size:
+                count -= 1
+            index.truncate(count * HISTORY_INDEX_BYTES)
+            end = self.read_end(index, count - 1) if count > 0 else 0
+            log.seek(end)
+            for line in log.read().split(b"\n")[:-1]:
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                end += len(line) + 1
+                index.write(end.to_bytes(HISTORY_INDEX_BYTES, "little"))
+                count += 1
+            log.truncate(end)
+        self.count = count
+        self.log_size = end
+    
+    def read_end(self, index, position: int) -> int:
+        """
+        Reads where an answer ends in the log from an open index file.
+        
+        Args:
+            index: the index file, opened for reading
+            position (int): which answer to look up, starting from 0
+        Returns:
+            int: the position in the log just after the answer's line
+        """
+        index.seek(position * HISTORY_INDEX_BYTES)
+        return int.from_bytes(index.read(HISTORY_INDEX_BYTES), "little")
+    
+    def append(self, answer: int | float | str):
+        """
+        Saves an answer at the end of the history. The answer goes into the log before its
+        position goes into the index, so the index never points at a missing answer.
+        
+        Args:
+            answer (int | float | str): the answer, or the preview of a long answer
+        """
+        line = (json.dumps(answer) + "\n").encode()
+        with self.lock:
+            if self.count == 0:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with io.open(self.log_path, "ab") as log:
+                log.write(line)
+                if HISTORY_FSYNC:
+                    log.flush()
+                    os.fsync(log.fileno())
+            self.log_size += len(line)
+            with io.open(self.index_path, "ab") as index:
+                index.write(self.log_size.to_bytes(HISTORY_INDEX_BYTES, "little"))
+            self.count += 1
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def read(self, first: int, last: int) -> list:
+        """
+        Reads the answers from position first up to but not including position last,
+        reading only their part of the log.
+        
+        Args:
+            first (int): the position of the first answer to read, starting from 0
+            last (int): the position just after the last answer to read
+        Returns:
+            list: the answers, oldest first
+        """
+        if first >= last:
+            return []
+        with self.lock, io.open(self.index_path, "rb") as index, io.open(self.log_path, "rb") as log:
+            with mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ) as offsets:
+                def end_of(position: int) -> int:
+                    return int.from_bytes(offsets[position * HISTORY_INDEX_BYTES:
+                                                  (position + 1) * HISTORY_INDEX_BYTES], "little")
+                start = end_of(first - 1) if first > 0 else 0
+                end = end_of(last - 1)
+            log.seek(start)
+            lines = log.read(end - start).split(b"\n")[:-1]
+        return [json.loads(line) for line in lines]
+
+
+def short_operand(text: str) -> str:
+    """
+    Shortens a number the user typed in before it is kept in the history, the same way
+    long answers are shown as a preview, so the history does not hold on to huge inputs.
+    
+    Args:
+        text (str): the number as it was typed in
+    Returns:
+        str: the number, or its first and last digits and length if it is very long
+    """
+    if len(text) <= FULL_ANSWER_DIGITS:
+        return text
+    return text[:PREVIEW_DIGITS] + "..." + text[-PREVIEW_DIGITS:] + " (" + format(len(text), ",") + " digits)"
+
+
+def is_number(value) -> bool:
+    """
+    Checks whether an answer counts toward the history's statistics, which only adds up
+    answers that are finite numbers.
+    
+    Args:
+        value: the answer
+    Returns:
+        bool: whether the answer is an int or a finite float
+    """
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def result_key(text: str) -> int | float | str:
+    """
+    Turns an answer typed in to search the history into the value it is indexed by.
+    
+    Args:
+        text (str): the answer as it was typed in
+    Returns:
+        int | float | str: the whole number or decimal it stands for, or the text itself
+    """
+    text = text.strip()
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+@dataclass(slots=True)
+class HistoryRecord:
+    """
+    One answer in the answer history together with the math problem it is the answer to.
+    Two records are the same when they have the same problem and answer, whenever they
+    were made.
+    """
+    operator: str
+    operands: tuple
+    result: int | float | str
+    timestamp: float = field(default=0.0, compare=False)
+    
+    def __str__(self) -> str:
+        return str(self.result)
+    
+    def describe(self) -> str:
+        """
+        Writes out the math problem and its answer, such as "34 ** 2 = 1156".
+        
+        Returns:
+            str: the problem and answer, or just the answer if the problem is not known
+        """
+        if not self.operator:
+            return str(self.result)
+        if self.operator == "expression":
+            problem = self.operands[0]
+        elif self.operator == "!":
+            problem = self.operands[0] + "!"
+        elif self.operator == "exact /":
+            problem = (self.operands[0] + " / " + self.operands[1]
+                       + (" to " + self.operands[2] + " digits" if len(self.operands) > 2 else " exactly"))
+        elif self.operator in OPERATORS and len(self.operands) == 2:
+            problem = self.operands[0] + " " + self.operator + " " + self.operands[1]
+        else:
+            problem = self.operator + "(" + ", ".join(self.operands) + ")"
+        return problem + " = " + str(self.result)
+    
+    def to_json(self) -> list:
+        """
+        Turns the record into a list that can be written as JSON.
+        
+        Returns:
+            list: the operator, operands, result and timestamp
+        """
+        return [self.operator, list(self.operands), self.result, self.timestamp]
+    
+    @staticmethod
+    def from_json(value) -> "HistoryRecord":
+        """
+        Turns a value read from a history log back into a record. Logs saved before records
+        were kept only have the answer.
+        
+        Args:
+            value: the value read from the log
+        Returns:
+            HistoryRecord: the record
+        """
+        if isinstance(value, list):
+            return HistoryRecord(value[0], tuple(value[1]), value[2], value[3])
+        return HistoryRecord("", (), value)
+
+
+class AnswerHistory:
+    """
+    The user's most recent answers, oldest first. The answers are kept in a fixed number
+    of slots that are reused in a circle, so adding an answer never copies the others and
+    the oldest answer is forgotten once every slot is full. Answers are kept as numbers,
+    except for long answers which are kept as their preview so that the history does not
+    hold on to huge numbers. A history with a HistoryLog keeps no slots at all: it is the
+    last capacity answers of the log, which are read from disk when they are needed.
+    
+    Every answer is kept with the operator and operands of the problem it answers and the
+    time it was made, in slots next to the answer's slot rather than in an object of its
+    own, so an answer without a problem takes little more memory than a bare answer.
+    HistoryRecord objects are only made when records are read. Records are looked up by
+    operator and by answer through indexes that give their numbers, counting every record
+    ever added, so looking up never scans the history. An index keeps a single number for
+    an answer that is only in the history once, and a queue of numbers once it repeats.
+    The total, smallest and largest of the answers that are numbers are kept up to date
+    as answers come and go. Whole numbers and decimals are totalled apart, so whole
+    numbers too big for a float stay exact. The smallest and largest are kept in queues
+    of the answers that could still become the smallest or largest once older answers are
+    forgotten. Two histories are equal when they hold the same answers.
+    """
+    
+    def __init__(self, answers=(), capacity: int = HISTORY_CAPACITY, log: HistoryLog | None = None):
+        self.capacity = capacity
+        self.log = log
+        self.slots = [None] * capacity if log is None else []
+        self.operators = [""] * capacity if log is None else []
+        self.operands = [()] * capacity if log is None else []
+        self.times = array.array("d", bytes(8 * capacity) if log is None else b"")
+        self.start = 0
+        self.size = 0 if log is None else min(len(log), capacity)
+        self.answer_bytes = 0
+        self.index_bytes = 0
+        self.added = 0 if log is None else len(log)
+        self.by_operator = {}
+        self.by_result = {}
+        self.whole_total = 0
+        self.decimal_total = 0.0
+        self.number_count = 0
+        self.decimal_count = 0
+        self.smallest = collections.deque()
+        self.largest = collections.deque()
+        for number, record in enumerate(self, self.added - self.size):
+            self.index(number, record.operator, record.result)
+        for answer in answers:
+            self.append(answer)
+    
+    def append(self, answer: int | float | str | HistoryRecord, operator: str = "", operands: tuple = ()):
+        """
+        Adds an answer to the end of the history, forgetting the oldest answer if the
+        history is full.
+        
+        Args:
+            answer (int | float | str | HistoryRecord): the answer, or the preview of a long
+            answer, or a whole record
+            operator (str): the operator that gave the answer, or "" if it is not known
+            operands (tuple): the numbers or math problem the operator was used on
+        """
+        if isinstance(answer, HistoryRecord):
+            operator, operands, answer, timestamp = answer.operator, answer.operands, answer.result, answer.timestamp
+        else:
+            operands, timestamp = tuple(map(short_operand, operands)), time.time()
+        if self.size == self.capacity:
+            oldest = self[0]
+            self.unindex(self.added - self.size, oldest.operator, oldest.result)
+        self.index(self.added, operator, answer)
+        self.added += 1
+        if self.log is not None:
+            self.log.append(HistoryRecord(operator, operands, answer, timestamp).to_json())
+            self.size = min(self.size + 1, self.capacity)
+            return
+        if self.size < self.capacity:
+            slot = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            slot = self.start
+            self.answer_bytes -= self.entry_bytes(self.slots[slot], self.operands[slot])
+            self.start = (self.start + 1) % self.capacity
+        self.slots[slot], self.operators[slot], self.operands[slot] = answer, operator, operands
+        self.times[slot] = timestamp
+        self.answer_bytes += self.entry_bytes(answer, operands)
+    
+    def entry_bytes(self, answer: int | float | str, operands: tuple) -> int:
+        """
+        Estimates how much memory an answer, its operands and its index entries take up.
+        Operators are not counted since every record with the same operator shares it.
+        
+        Args:
+            answer (int | float | str): the answer
+            operands (tuple): the numbers or math problem the operator was used on
+        Returns:
+            int: the size in bytes
+        """
+        size = sys.getsizeof(answer) + 2 * sys.getsizeof(self.added)
+        if operands:
+            size += sys.getsizeof(operands) + sum(map(sys.getsizeof, operands))
+        return size
+    
+    def record_at(self, slot: int) -> HistoryRecord:
+        """
+        Makes the record kept in one of the slots.
+        
+        Args:
+            slot (int): the slot
+        Returns:
+            HistoryRecord: the answer in the slot with its problem and time
+        """
+        return HistoryRecord(self.operators[slot], self.operands[slot], self.slots[slot], self.times[slot])
+    
+    @staticmethod
+    def result_index_key(value: int | float | str) -> int | float | str:
+        """
+        Finds the key an answer is indexed by. Infinity and not a number are indexed by
+        their text, since a not a number read back from a log is not equal to itself.
+        
+        Args:
+            value (int | float | str): the answer
+        Returns:
+            int | float | str: the key for the answer in the index
+        """
+        if isinstance(value, float) and not math.isfinite(value):
+            return repr(value)
+        return value
+    
+    def add_to(self, index: dict, key, number: int):
+        """
+        Adds a record's number to an index, keeping the number on its own until a second
+        record has the same key.
+        
+        Args:
+            index (dict): the index, by_operator or by_result
+            key: what the record is looked up by
+            number (int): the record's number, counting every record ever added
+        """
+        numbers = index.get(key)
+        if numbers is None:
+            index[key] = number
+            return
+        if isinstance(numbers, int):
+            numbers = index[key] = collections.deque([numbers])
+        else:
+            self.index_bytes -= sys.getsizeof(numbers)
+        numbers.append(number)
+        self.index_bytes += sys.getsizeof(numbers)
+    
+    def remove_from(self, index: dict, key):
+        """
+        Takes the oldest number for a key out of an index.
+        
+        Args:
+            index (dict): the index, by_operator or by_result
+            key: what the record is looked up by
+        """
+        numbers = index[key]
+        if isinstance(numbers, int):
+            del index[key]
+            return
+        self.index_bytes -= sys.getsizeof(numbers)
+        numbers.popleft()
+        if len(numbers) == 1:
+            index[key] = numbers[0]
+        else:
+            self.index_bytes += sys.getsizeof(numbers)
+    
+    def index(self, number: int, operator: str, value: int | float | str):
+        """
+        Adds a record to the indexes and the statistics.
+        
+        Args:
+            number (int): the record's number, counting every record ever added
+            operator (str): the record's operator
+            value (int | float | str): the record's answer
+        """
+        self.add_to(self.by_operator, operator, number)
+        self.add_to(self.by_result, self.result_index_key(value), number)
+        if is_number(value):
+            if isinstance(value, float):
+                self.decimal_total += value
+                self.decimal_count += 1
+            else:
+                self.whole_total += value
+            self.number_count += 1
+            while self.smallest and self.smallest[-1][1] >= value:
+                self.smallest.pop()
+            self.smallest.append((number, value))
+            while self.largest and self.largest[-1][1] <= value:
+                self.largest.pop()
+            self.largest.append((number, value))
+    
+    def unindex(self, number: int, operator: str, value: int | float | str):
+        """
+        Takes the oldest record out of the indexes and the statistics when it is forgotten.
+        
+        Args:
+            number (int): the record's number, counting every record ever added
+            operator (str): the record's operator
+            value (int | float | str): the record's answer
+        """
+        self.remove_from(self.by_operator, operator)
+        self.remove_from(self.by_result, self.result_index_key(value))
+        if is_number(value):
+            self.number_count -= 1
+            if isinstance(value, float):
+                self.decimal_count -= 1
+                self.decimal_total = self.decimal_total - value if self.decimal_count else 0.0
+            else:
+                self.whole_total -= value
+            if self.smallest[0][0] == number:
+                self.smallest.popleft()
+            if self.largest[0][0] == number:
+                self.largest.popleft()
+    
+    def find(self, operator: str | None = None, result: int | float | str | None = None) -> list:
+        """
+        Looks up the records with the given operator, answer, or both, using the indexes.
+        
+        Args:
+            operator (str | None): the operator to look for, or None for any operator
+            result (int | float | str | None): the answer to look for, or None for any answer
+        Returns:
+            list: the matching records, oldest first
+        """
+        matches = None
+        if result is not None:
+            result = self.result_index_key(result)
+        for index, key in [(self.by_operator, operator), (self.by_result, result)]:
+            if key is not None:
+                numbers = index.get(key, ())
+                if isinstance(numbers, int):
+                    numbers = (numbers,)
+                matches = numbers if matches is None else sorted(set(matches).intersection(numbers))
+        if matches is None:
+            return list(self)
+        first_number = self.added - self.size
+        return [self[number - first_number] for number in matches]
+    
+    def statistics(self) -> dict:
+        """
+        Gives the count, total, smallest, largest and average of the answers in the
+        history that are numbers, which are kept up to date as answers are added.
+        
+        Returns:
+            dict: the statistics, with None for those that need at least one number
+        """
+        if not self.number_count:
+            return {"count": 0, "total": 0, "smallest": None, "largest": None, "average": None}
+        try:
+            total = self.whole_total + self.decimal_total if self.decimal_count else self.whole_total
+            average = total / self.number_count
+        except OverflowError:
+            total, average = self.whole_total, self.whole_total // self.number_count
+        return {"count": self.number_count, "total": total, "smallest": self.smallest[0][1],
+                "largest": self.largest[0][1], "average": average}
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __getitem__(self, position: int) -> HistoryRecord:
+        if not 0 <= position < self.size:
+            raise IndexError("answer history position out of range")
+        if self.log is not None:
+            first = len(self.log) - self.size + position
+            return HistoryRecord.from_json(self.log.read(first, first + 1)[0])
+        return self.record_at((self.start + position) % self.capacity)
+    
+    def __iter__(self):
+        if self.log is not None:
+            yield from map(HistoryRecord.from_json, self.log.read(len(self.log) - self.size, len(self.log)))
+            return
+        for position in range(self.size):
+            yield self.record_at((self.start + position) % self.capacity)
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AnswerHistory) and self.results() == other.results()
+    
+    def __repr__(self) -> str:
+        return "AnswerHistory(" + repr(self.results()) + ")"
+    
+    def results(self) -> list:
+        """
+        Lists the answers in the history without their problems.
+        
+        Returns:
+            list: the answers, oldest first
+        """
+        if self.log is not None:
+            return [record.result for record in self]
+        return [self.slots[(self.start + position) % self.capacity] for position in range(self.size)]
+    
+    def nbytes(self) -> int:
+        """
+        Estimates how much memory the history takes up.
+        
+        Returns:
+            int: the size of the slots, the answers and operands in them, their indexes
+            and the queues of the smallest and largest answers, in bytes
+        """
+        queued = len(self.smallest) + len(self.largest)
+        return (sys.getsizeof(self.slots) + sys.getsizeof(self.operators) + sys.getsizeof(self.operands)
+                + sys.getsizeof(self.times) + self.answer_bytes + sys.getsizeof(self.by_operator)
+                + sys.getsizeof(self.by_result) + self.index_bytes + sys.getsizeof(self.smallest)
+                + sys.getsizeof(self.largest) + queued * sys.getsizeof((0, 0)))
+    
+    def page_count(self, page_size: int = HISTORY_PAGE_SIZE) -> int:
+        """
+        Counts how many pages it takes to show the whole history.
+        
+        Args:
+            page_size (int): how many answers are shown on each page
+        Returns:
+            int: the number of pages, which is at least 1
+        """
+        return max(1, math.ceil(self.size / page_size))
+    
+    def page(self, number: int, page_size: int = HISTORY_PAGE_SIZE) -> list:
+        """
+        Gets the answers shown on one page of the history.
+        
+        Args:
+            number (int): which page to get, starting from 0
+            page_size (int): how many answers are shown on each page
+        Returns:
+            list: the records on that page, oldest first
+        """
+        first = number * page_size
+        last = min(first + page_size, self.size)
+        if self.log is not None:
+            skipped = len(self.log) - self.size
+            return list(map(HistoryRecord.from_json, self.log.read(skipped + first, skipped + last)))
+        return [self[position] for position in range(first, last)]
+
 
 @dataclass
 class State:
     """
-    The current state of the calculator.
+    The current state of the calculator. Every user gets their own state for their
+    session, and the shared state the server starts with is only used to start sessions.
+    """
+    first_digit: str
+    second_digit: str
+    answer_history: AnswerHistory
+    valid_input: bool
+    result: str
+    session: str = ""
+    shared: bool = False
+
+
+class SessionStore:
+    """
+    Keeps the state of every user's session so that users working at the same time do
+    not see each other's answers. Sessions that have not been visited for a while are
+    forgotten, and so are the least recently visited sessions whenever there are too many
+    sessions or they take up too much memory. It is safe to use from several threads.
+    When the store has a history directory, every session's answer history is saved there,
+    so a forgotten session, or one from before a restart, gets its answers back. Only
+    session ids that the store made itself are saved: they are signed with a secret key
+    kept in the history directory, so a user cannot make up ids to fill the disk. Saved
+    histories that have not been added to for a long time are deleted.
+    """
+    
+    def __init__(self, limit: int, max_bytes: int, idle_seconds: float, directory: str = ""):
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.directory = directory
+        self.sessions = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.keys = {}
+        self.last_cleanup = float("-inf")
+    
+    def get(self, session: str) -> State:
+        """
+        Finds the state of a session and marks it as recently visited. A session that is
+        unknown, such as one that was forgotten, starts over with a fresh state.
+        
+        Args:
+            session (str): the id of the session
+        Returns:
+            State: the state of the session
+        """
+        now = time.monotonic()
+        with self.lock:
+            if session in self.sessions:
+                state, _, size = self.sessions.pop(session)
+                self.bytes -= size
+            else:
+                state = State("", "", self.new_history(session), True, "", session=session)
+            size = state.answer_history.nbytes()
+            self.sessions[session] = (state, now, size)
+            self.bytes += size
+            self.evict(now)
+            return state
+    
+    def new_history(self, session: str) -> AnswerHistory:
+        """
+        Makes the answer history for a session that is not in the store, opening its saved
+        history if the store has a history directory and made the session's id. Any other
+        session only gets a history in memory. The id is the file name followed by "." and
+        its signature, and only file names made of letters, digits, "-" and "_" are used.
+        
+        Args:
+            session (str): the id of the session
+        Returns:
+            AnswerHistory: the session's answer history
+        """
+        name, _, signature = session.partition(".")
+        if not self.directory or not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", name):
+            return AnswerHistory()
+        if not hmac.compare_digest(signature.encode(), self.sign(name).encode()):
+            return AnswerHistory()
+        return AnswerHistory(log=HistoryLog(os.path.join(self.folder(), name)))
+    
+    def folder(self) -> str:
+        """
+        Finds the folder the store saves histories in.
+        
+        Returns:
+            str: the history directory, next to this file
+        """
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), self.directory)
+    
+    def sign(self, name: str) -> str:
+        """
+        Signs the file name of a session's history with the secret key of the history
+        folder, making the key and saving it in the folder the first time it is needed.
+        
+        Args:
+            name (str): the file name of the session's history
+        Returns:
+            str: the signature
+        """
+        folder = self.folder()
+        if folder not in self.keys:
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, "session.key")
+            try:
+                descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                with io.open(path, "rb") as key_file:
+                    self.keys[folder] = key_file.read()
+            else:
+                self.keys[folder] = secrets.token_bytes(32)
+                with io.open(descriptor, "wb") as key_file:
+                    key_file.write(self.keys[folder])
+        return hmac.new(self.keys[folder], name.encode(), "sha256").hexdigest()[:32]
+    
+    def create(self) -> State:
+        """
+        Starts a new session with a fresh state. When the store saves histories, the new
+        session's id is signed, and old saved histories are cleaned up in the background
+        at most once every HISTORY_CLEANUP_SECONDS.
+        
+        Returns:
+            State: the state of the new session
+        """
+        session = secrets.token_urlsafe(16)
+        if self.directory:
+            session += "." + self.sign(session)
+            now = time.monotonic()
+            with self.lock:
+                due = now - self.last_cleanup >= HISTORY_CLEANUP_SECONDS
+                if due:
+                    self.last_cleanup = now
+            if due:
+                threading.Thread(target=self.clean_up, name="history-cleanup", daemon=True).start()
+        return self.get(session)
+    
+    def clean_up(self):
+        """
+        Deletes the saved histories that have not been added to for
+        HISTORY_RETENTION_SECONDS, and the oldest ones beyond HISTORY_MAX_SAVED, except
+        those of sessions in the store.
+        """
+        if not self.directory:
+            return
+        folder = self.folder()
+        with self.lock:
+            open_names = {session.partition(".")[0] for session in self.sessions}
+        saved = []
+        for entry in os.scandir(folder) if os.path.isdir(folder) else []:
+            if entry.name.endswith(".log") and entry.name[:-4] not in open_names:
+                try:
+                    saved.append((entry.stat().st_mtime, entry.path[:-4]))
+                except FileNotFoundError:
+                    pass
+        saved.sort(reverse=True)
+        oldest_kept = time.time() - HISTORY_RETENTION_SECONDS
+        for position, (modified, path) in enumerate(saved):
+            if modified < oldest_kept or position >= HISTORY_MAX_SAVED:
+                for extension in [".log", ".idx"]:
+                    try:
+                        os.remove(path + extension)
+                    except FileNotFoundError:
+                        pass
+    
+    def evict(self, now: float):
+        """
+        Forgets idle sessions and the least recently visited sessions until the store is
+        within its limits. The newest session is always kept. Must be called with the
+        lock held.
+        
+        Args:
+            now (float): the current time from time.monotonic()
+        """
+        while len(self.sessions) > 1:
+            _, (_, last_visit, size) = next(iter(self.sessions.items()))
+            if (now - last_visit <= self.idle_seconds and len(self.sessions) <= self.limit
+                    and self.bytes <= self.max_bytes):
+                break
+            self.sessions.popitem(last=False)
+            self.bytes -= size
+
+
+sessions = SessionStore(SESSION_LIMIT, SESSION_MEMORY_BYTES, SESSION_IDLE_SECONDS, HISTORY_DIRECTORY)
+
+
+def session_state(state: State, session: str) -> State:
+    """
+    Finds the state that a route should work with. Users with a session get their
+    session's state. A user without one who arrives with the shared state the server
+    started with, or with another session's state, gets a new session of their own. Any
+    other state, such as one made by a test, is used as it is.
+    
+    Args:
+        state (State): the state the server passed to the route
+        session (str): the id of the user's session, or "" if they do not have one yet
+    Returns:
+        State: the state to use for this user
+    """
+    if session:
+        return sessions.get(session)
+    if state.shared or state.session:
+        return sessions.create()
+    return state
+
+
+def session_arguments(state: State) -> list:
+    """
+    Gives the arguments a button needs so that clicking it keeps the user in their session.
+    
+    Args:
+        state (State): the current state of the calculator
+    Returns:
+        list: the session argument, or nothing if the state has no session
+    """
+    if state.session:
+        return [Argument("session", state.session)]
+    return []
+
+
+def estimate_power_bits(base: int, exponent: int) -> int:
+    """
+    Predicts how many bits the answer to base ** exponent will need without computing it.
+    The answer has about exponent * log2(base) bits, and base.bit_length() is never smaller
+    than log2(base), so the estimate never comes in under the real size.
+    
+    Args:
+        base (int): the number being raised to a power
+        exponent (int): the power the base is raised to
+    Returns:
+        int: an upper bound on the number of bits in the answer
+    """
+    if base <= 1 or exponent == 0:
+        return 1
+    return exponent * base.bit_length()
+
+
+def limit_power_worker():
+    """
+    Runs once in every new worker process and caps how much CPU time and memory the
+    exponent job it runs may use, so a runaway job is stopped by the operating system
+    instead of taking the whole machine with it.
+    """
+    resource.setrlimit(resource.RLIMIT_CPU, (POWER_CPU_SECONDS, POWER_CPU_SECONDS + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (POWER_MEMORY_BYTES, POWER_MEMORY_BYTES))
+
+
+def workers_available() -> bool:
+    """
+    Checks whether expensive jobs can run in worker processes. They cannot on systems
+    that are unable to fork worker processes or limit their resources.
+    
+    Returns:
+        bool: True if worker processes can be used
+    """
+    if in_power_worker or resource is None:
+        return False
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def run_power_job(connection, function, arguments: tuple):
+    """
+    Runs inside a worker process: limits its resources, runs one job and sends back
+    whether it finished along with its answer, or the error it raised.
+    
+    Args:
+        connection: the end of the pipe the answer is sent through
+        function: the calculation to run
+        arguments (tuple): the arguments to give it
+    """
+    global in_power_worker
+    in_power_worker = True
+    limit_power_worker()
+    try:
+        connection.send((True, function(*arguments)))
+    except MemoryError:
+        connection.send((False, None))
+    except Exception as error:
+        connection.send((None, error))
+    finally:
+        connection.close()
+
+
+def run_in_worker(function, arguments: tuple, timeout: float | None = None) -> tuple:
+    """
+    Runs one expensive job in a worker process of its own, so that a job which runs out
+    of time can be stopped by killing just its process without touching anyone else's
+    job. At most POWER_WORKERS jobs run at once, and waiting for a turn counts towards
+    the job's time limit. An error raised by the job is raised again here.
+    
+    Args:
+        function: the calculation to run
+        arguments (tuple): the arguments to give it
+        timeout (float | None): the time limit in seconds, or None for POWER_TIMEOUT_SECONDS
+    Returns:
+        tuple: (True, answer) if the job finished, or (False, None) if it ran out of
+        time or memory
+    """
+    timeout = POWER_TIMEOUT_SECONDS if timeout is None else max(0, timeout)
+    deadline = time.monotonic() + timeout
+    if not power_job_slots.acquire(timeout=timeout):
+        return False, None
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    worker = context.Process(target=run_power_job, args=(sender, function, arguments), daemon=True)
+    try:
+        with power_jobs_lock:
+            worker.start()
+            power_jobs.add(worker)
+        sender.close()
+        if not receiver.poll(max(0, deadline - time.monotonic())):
+            return False, None
+        finished, answer = receiver.recv()
+        if finished is None:
+            raise answer
+        return finished, answer
+    except EOFError:
+        return False, None
+    finally:
+        receiver.close()
+        with power_jobs_lock:
+            power_jobs.discard(worker)
+        if worker.pid is not None:
+            worker.kill()
+            worker.join()
+        power_job_slots.release()
+
+
+def cancel_power_jobs():
+    """
+    Stops every exponent job that is still running by killing its worker process, for
+    when the server shuts down.
+    """
+    with power_jobs_lock:
+        for worker in power_jobs:
+            worker.kill()
+        power_jobs.clear()
+
+
+def compute_power(base: int, exponent: int) -> int | None:
+    """
+    Computes base ** exponent within the calculator's budget. Small answers are computed
+    right away, bigger ones are computed in a worker process with CPU time, memory and
+    wall clock limits, and answers that are predicted to be too big are never computed.
+    
+    Args:
+        base (int): the number being raised to a power
+        exponent (int): the power the base is raised to
+    Returns:
+        int | None: the answer, or None if it is too large to compute within the budget
+    """
+    return compute_within_budget(pow, estimate_power_bits(base, exponent), base, exponent)
+
+
+def compute_within_budget(function, bits: int, first: int, second: int) -> int | None:
+    """
+    Computes function(first, second) within the calculator's budget, the same way for
+    every operator whose answers can get huge. Small answers are computed right away,
+    bigger ones are computed in a worker process with CPU time, memory and wall clock
+    limits, and answers that are predicted to be too big are never computed.
+    
+    Args:
+        function: the operator to compute
+        bits (int): the predicted number of bits in the answer
+        first (int): the first number
+        second (int): the second number
+    Returns:
+        int | None: the answer, or None if it is too large to compute within the budget
+    """
+    if bits > MAX_POWER_BITS:
+        return None
+    if bits <= INLINE_POWER_BITS or not workers_available():
+        return function(first, second)
+    finished, answer = run_in_worker(function, (first, second))
+    return answer
+
+
+def compute_in_worker(function, *arguments, timeout: float | None = None):
+    """
+    Runs a slow calculation that stops on its own, such as factoring with a deadline, in
+    a power worker process, so that it does not hold up the rest of the server while it
+    runs. The calculation runs right away when there are no worker processes.
+    
+    Args:
+        function: the calculation to run
+        arguments: the arguments to give it
+        timeout (float | None): the time limit in seconds, or None for POWER_TIMEOUT_SECONDS
+    Returns:
+        whatever the calculation gives back, or None if it ran out of time
+    """
+    if not workers_available():
+        return function(*arguments)
+    finished, answer = run_in_worker(function, arguments, timeout)
+    return answer
+
+
+def compute_from_digits(function, *numbers: str) -> int | float | None:
+    """
+    Reads the digits of some numbers and works out function of them.
+    
+    Args:
+        function: the operator to compute
+        numbers (str): the digits of each number
+    Returns:
+        int | float | None: the answer, or None if it is too large to compute
+    """
+    return function(*map(parse_digits, numbers))
+
+
+def work_out(function, *numbers: str) -> tuple:
+    """
+    Reads the digits of some numbers, works out function of them and writes out the
+    answer, all in one go so that it can be done in a worker process.
+    
+    Args:
+        function: the operator to compute
+        numbers (str): the digits of each number
+    Returns:
+        tuple: the answer and the text shown for it, or (None, "") if it is too large
+    """
+    value = compute_from_digits(function, *numbers)
+    if value is None:
+        return None, ""
+    return value, preview_answer(value) if is_long_answer(value) else str(value)
+
+
+@dataclass(frozen=True)
+class LongAnswer:
+    """
+    A long answer that was left behind in a worker process. Only how to work it out again
+    is kept, so the full answer page can write out its digits in a worker process of its
+    own when the user asks to see them.
+    """
+    function: object
+    arguments: tuple
+    
+    def write_out(self) -> str:
+        """
+        Works out the answer again and writes out every digit of it.
+        
+        Returns:
+            str: the digits of the answer
+        """
+        return int_to_decimal(self.function(*self.arguments))
+
+
+def work_out_in_worker(function, *arguments) -> tuple:
+    """
+    Runs inside a worker process, works out function(*arguments) and writes out the
+    answer like work_out does, but an answer with more than WORKER_ANSWER_BITS bits is
+    left behind and only its text is sent back.
+    
+    Args:
+        function: the calculation to run, such as compute_from_digits or run_expression
+        arguments: the arguments to give it
+    Returns:
+        tuple: the answer, or None if it is too large or was left behind, the text shown
+        for it, and whether it was left behind
+    """
+    value = function(*arguments)
+    if value is None:
+        return None, "", False
+    text = preview_answer(value) if is_long_answer(value) else str(value)
+    if isinstance(value, int) and value.bit_length() > WORKER_ANSWER_BITS:
+        return None, text, True
+    return value, text, False
+
+
+def work_out_long(function, *arguments) -> tuple | None:
+    """
+    Works out a slow calculation and writes out its answer in a worker process with a
+    time limit. A long answer is remembered for the full answer page, as a LongAnswer if
+    it was too big to bring back from the worker process.
+    
+    Args:
+        function: the calculation to run, such as compute_from_digits or run_expression
+        arguments: the arguments to give it
+    Returns:
+        tuple | None: the answer, or a LongAnswer, and the text shown for it, or None if
+        it is too large to compute within the budget
+    """
+    finished, worked_out = run_in_worker(work_out_in_worker, (function, *arguments))
+    if worked_out is None:
+        return None
+    value, text, left_behind = worked_out
+    if left_behind:
+        value = LongAnswer(function, arguments)
+    if value is None:
+        return None
+    if is_long_answer(value):
+        remember_full_answer(text, value)
+    return value, text
+
+
+def compute_digits(function, *numbers: str, inline_digits: int = WORKER_INPUT_DIGITS) -> tuple | None:
+    """
+    Works out function of some numbers typed in as digits. Numbers with more than
+    inline_digits digits in total are read and computed in a worker process with a time
+    limit, since reading and multiplying numbers that long keeps the rest of the server
+    waiting.
+    
+    Args:
+        function: the operator to compute
+        numbers (str): the digits of each number
+        inline_digits (int): the most digits in total that are worked out right here
+    Returns:
+        tuple | None: the answer, or a LongAnswer if it was too big to bring back from the
+        worker process, and the text shown for it, or None if it is too large to compute
+        within the budget
+    """
+    if sum(map(len, numbers)) > inline_digits and workers_available():
+        return work_out_long(compute_from_digits, function, *numbers)
+    value, text = work_out(function, *numbers)
+    if value is None:
+        return None
+    if is_long_answer(value):
+        remember_full_answer(text, value)
+    return value, text
+
+
+def log2_factorial(number: int) -> float:
+    """
+    Works out log2(number!) from the log gamma function, without computing the factorial.
+    
+    Args:
+        number (int): the number whose factorial is measured
+    Returns:
+        float: about how many bits number! needs
+    """
+    return math.lgamma(number + 1) / math.log(2)
+
+
+def estimate_factorial_bits(number: int, unused: int = 0) -> int:
+    """
+    Predicts how many bits number! will need. Past 3, number! has more bits than number
+    itself, so numbers too big for the log gamma function are simply too large.
+    
+    Args:
+        number (int): the number whose factorial is wanted
+        unused (int): ignored, so every operator takes two numbers
+    Returns:
+        int: about how many bits the answer needs, never much less than the real size
+    """
+    if number > MAX_POWER_BITS:
+        return number
+    return int(log2_factorial(number)) + 2
+
+
+def estimate_permutations_bits(total: int, chosen: int) -> int:
+    """
+    Predicts how many bits nPr = total! / (total - chosen)! will need. Totals too big
+    for floating point use the upper bound total ** chosen instead.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked
+    Returns:
+        int: about how many bits the answer needs, never much less than the real size
+    """
+    if chosen > total or chosen == 0:
+        return 1
+    if total > EXACT_FLOAT_MAX:
+        return chosen * total.bit_length()
+    return int(log2_factorial(total) - log2_factorial(total - chosen)) + 2
+
+
+def estimate_combinations_bits(total: int, chosen: int) -> int:
+    """
+    Predicts how many bits nCr = total! / (chosen! * (total - chosen)!) will need.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked
+    Returns:
+        int: about how many bits the answer needs, never much less than the real size
+    """
+    if chosen > total:
+        return 1
+    chosen = min(chosen, total - chosen)
+    if total > EXACT_FLOAT_MAX:
+        return estimate_permutations_bits(total, chosen)
+    bits = max(1, int(log2_factorial(total) - log2_factorial(chosen) - log2_factorial(total - chosen)) + 2)
+    if uses_prime_sieve(total, chosen):
+        return max(bits, total)
+    return bits
+
+
+def uses_prime_sieve(total: int, chosen: int) -> bool:
+    """
+    Decides whether nCr is built from the primes up to total. The sieve needs a byte for
+    every number up to total, so it is only used when total is small enough and chosen is
+    big enough that the sieve costs less than multiplying out the numbers directly.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked, at most half of total
+    Returns:
+        bool: whether combinations uses the prime sieve
+    """
+    return chosen >= 64 and total <= COMBINATIONS_SIEVE_LIMIT and chosen * COMBINATIONS_SIEVE_FRACTION >= total
+
+
+def primes_up_to(limit: int) -> list[int]:
+    """
+    Lists every prime up to limit with the sieve of Eratosthenes.
+    
+    Args:
+        limit (int): the biggest number to check
+    Returns:
+        list[int]: the primes from smallest to largest
+    """
+    if limit < 2:
+        return []
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0:2] = bytes(2)
+    for number in range(2, math.isqrt(limit) + 1):
+        if sieve[number]:
+            sieve[number * number::number] = bytes(len(range(number * number, limit + 1, number)))
+    return [number for number, is_prime in enumerate(sieve) if is_prime]
+
+
+def prime_power_in_factorial(number: int, prime: int) -> int:
+    """
+    Counts how many times prime divides number! with Legendre's formula.
+    
+    Args:
+        number (int): the number whose factorial is checked
+        prime (int): the prime to count
+    Returns:
+        int: the exponent of prime in number!
+    """
+    count = 0
+    while number:
+        number //= prime
+        count += number
+    return count
+
+
+def product_tree(numbers: list[int]) -> int:
+    """
+    Multiplies numbers together in pairs, then the pairs in pairs, and so on, so that the
+    big multiplications are between numbers of about the same size, which is much faster
+    than multiplying them one after another.
+    
+    Args:
+        numbers (list[int]): the numbers to multiply
+    Returns:
+        int: their product
+    """
+    while len(numbers) > 1:
+        paired = [numbers[index] * numbers[index + 1] for index in range(0, len(numbers) - 1, 2)]
+        if len(numbers) % 2:
+            paired.append(numbers[-1])
+        numbers = paired
+    return numbers[0] if numbers else 1
+
+
+def factorial(number: int, unused: int = 0) -> int:
+    """
+    Computes number!. Python's math.factorial already multiplies by binary splitting, so
+    it is used as is.
+    
+    Args:
+        number (int): the number whose factorial is wanted
+        unused (int): ignored, so every operator takes two numbers
+    Returns:
+        int: number!
+    """
+    return math.factorial(number)
+
+
+def combinations(total: int, chosen: int) -> int:
+    """
+    Computes nCr, the number of ways to choose chosen things out of total. When chosen
+    is a sizeable part of a total that is not too big, the answer is built from its
+    prime factors, found with Legendre's formula, and multiplied with a product tree,
+    which is much faster than math.comb. Otherwise the prime factors of chosen! are
+    divided out of the numbers from total - chosen + 1 up to total one at a time, and
+    what is left is multiplied with a product tree, which avoids dividing by chosen!
+    as one huge number.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked
+    Returns:
+        int: the number of combinations
+    """
+    if chosen > total:
+        return 0
+    chosen = min(chosen, total - chosen)
+    if chosen < 64:
+        return math.comb(total, chosen)
+    if not uses_prime_sieve(total, chosen):
+        start = total - chosen + 1
+        terms = list(range(start, total + 1))
+        for prime in primes_up_to(chosen):
+            count, power = prime_power_in_factorial(chosen, prime), prime
+            while count:
+                for index in range(-start % power, chosen, power):
+                    terms[index] //= prime
+                    count -= 1
+                    if not count:
+                        break
+                power *= prime
+        return product_tree(terms)
+    powers = []
+    for prime in primes_up_to(total):
+        count = (prime_power_in_factorial(total, prime) - prime_power_in_factorial(chosen, prime)
+                 - prime_power_in_factorial(total - chosen, prime))
+        if count:
+            powers.append(prime ** count)
+    return product_tree(powers)
+
+
+def permutations(total: int, chosen: int) -> int:
+    """
+    Computes nPr, the number of ways to line up chosen things out of total, as the
+    product tree of the numbers from total - chosen + 1 up to total.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked
+    Returns:
+        int: the number of permutations
+    """
+    if chosen > total:
+        return 0
+    if chosen < 64:
+        return math.perm(total, chosen)
+    return product_tree(list(range(total - chosen + 1, total + 1)))
+
+
+def compute_factorial(number: int, unused: int = 0) -> int | None:
+    """
+    Computes number! within the calculator's budget.
+    
+    Args:
+        number (int): the number whose factorial is wanted
+        unused (int): ignored, so every operator takes two numbers
+    Returns:
+        int | None: the answer, or None if it is too large to compute within the budget
+    """
+    return compute_within_budget(factorial, estimate_factorial_bits(number), number, unused)
+
+
+def compute_combinations(total: int, chosen: int) -> int | None:
+    """
+    Computes nCr within the calculator's budget.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked
+    Returns:
+        int | None: the answer, or None if it is too large to compute within the budget
+    """
+    return compute_within_budget(combinations, estimate_combinations_bits(total, chosen), total, chosen)
+
+
+def compute_permutations(total: int, chosen: int) -> int | None:
+    """
+    Computes nPr within the calculator's budget.
+    
+    Args:
+        total (int): how many things there are to pick from
+        chosen (int): how many of them are picked
+    Returns:
+        int | None: the answer, or None if it is too large to compute within the budget
+    """
+    return compute_within_budget(permutations, estimate_permutations_bits(total, chosen), total, chosen)
+
+
+@lru_cache(maxsize=64)
+def power_of_ten(exponent: int) -> int:
+    """
+    Computes 10 ** exponent, remembering recent powers since the same ones are needed
+    over and over when converting big numbers.
+    
+    Args:
+        exponent (int): the power of ten
+    Returns:
+        int: ten to the given power
+    """
+    return 10 ** exponent
+
+
+def parse_digits(digits: str) -> int:
+    """
+    Turns a string of digits into a number. Long strings are split in half and the halves
+    are converted separately and joined with a power of ten, which is much faster than
+    converting digit by digit and works for numbers of any length.
+    
+    Args:
+        digits (str): the digits of a non-negative number
+    Returns:
+        int: the number the digits spell out
+    """
+    if len(digits) <= SMALL_NUMBER_DIGITS:
+        return int(digits)
+    half = len(digits) // 2
+    return parse_digits(digits[:-half]) * power_of_ten(half) + parse_digits(digits[-half:])
+
+
+def int_to_decimal(value: int) -> str:
+    """
+    Writes out every digit of a number. Big numbers are split in half by their bits and
+    the halves are converted and joined back together with the decimal module, whose fast
+    multiplication makes this much quicker than str() for huge numbers and is not limited
+    in the number of digits.
+    
+    Args:
+        value (int): the number to write out
+    Returns:
+        str: the digits of the number
+    """
+    if value < 0:
+        return "-" + int_to_decimal(-value)
+    if value.bit_length() <= SMALL_NUMBER_BITS:
+        return str(value)
+    powers_of_two = {}
+    
+    def convert(number: int, bits: int) -> decimal.Decimal:
+        if bits <= SMALL_NUMBER_BITS:
+            return decimal.Decimal(number)
+        half = bits // 2
+        high = number >> half
+        low = number - (high << half)
+        if half not in powers_of_two:
+            powers_of_two[half] = decimal.Decimal(2) ** half
+        return convert(high, bits - half) * powers_of_two[half] + convert(low, half)
+    
+    with decimal.localcontext() as context:
+        context.prec = decimal.MAX_PREC
+        context.Emax = decimal.MAX_EMAX
+        context.Emin = decimal.MIN_EMIN
+        return str(convert(value, value.bit_length()))
+
+
+def preview_answer(value: int) -> str:
+    """
+    Describes a long number by its first and last digits and how many digits it has,
+    without writing out the digits in between.
+    
+    Args:
+        value (int): the number to describe
+    Returns:
+        str: the preview, such as "12345...67890 (1,234 digits)"
+    """
+    if value < 0:
+        return "-" + preview_answer(-value)
+    digits = math.floor((value.bit_length() - 1) * math.log10(2)) + 1
+    leading = value // power_of_ten(digits - PREVIEW_DIGITS)
+    if leading >= power_of_ten(PREVIEW_DIGITS):
+        digits += 1
+        leading //= 10
+    trailing = str(value % power_of_ten(PREVIEW_DIGITS)).zfill(PREVIEW_DIGITS)
+    return str(leading) + "..." + trailing + " (" + format(digits, ",") + " digits)"
+
+
+def is_long_answer(value: int | float) -> bool:
+    """
+    Checks whether an answer has too many digits to show all at once.
+    
+    Args:
+        value (int | float | LongAnswer): the answer to the math problem
+    Returns:
+        bool: whether the answer is shown as a preview
+    """
+    if isinstance(value, LongAnswer):
+        return True
+    return isinstance(value, int) and abs(value) >= power_of_ten(FULL_ANSWER_DIGITS)
+
+
+def format_answer(value: int | float) -> str:
+    """
+    Turns the answer to a math problem into the text shown to the user. Long answers are
+    shown as a preview, and the full number is kept so the user can read it on the full
+    answer page.
+    
+    Args:
+        value (int | float): the answer to the math problem
+    Returns:
+        str: the answer, or a preview of it if it is very long
+    """
+    if not is_long_answer(value):
+        return str(value)
+    text = preview_answer(value)
+    remember_full_answer(text, value)
+    return text
+
+
+def remember_full_answer(text: str, value: int | LongAnswer):
+    """
+    Keeps a long answer so the full answer page can show all of its digits, forgetting
+    the least recently computed long answer when there are too many.
+    
+    Args:
+        text (str): the preview the answer is shown as
+        value (int | LongAnswer): the answer itself, or how to work it out again
+    """
+    if text not in full_answers:
+        full_answers[text] = value
+    full_answers.move_to_end(text)
+    if len(full_answers) > FULL_ANSWER_SLOTS:
+        full_answers.popitem(last=False)
+
+
+class ResultCache:
+    """
+    Remembers the answers to recent math problems so that asking the same problem again
+    does not compute it again. Answers are weighed by how much memory they take up, so
+    one huge answer counts for as much as many small ones, and the least recently used
+    answers are forgotten once the cache is over its memory budget.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key: tuple) -> tuple | None:
+        """
+        Looks up a remembered answer and marks it as recently used.
+        
+        Args:
+            key (tuple): the operator and the two numbers of the math problem
+        Returns:
+            tuple | None: the answer text and value, or None if it is not remembered
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0], entry[1]
+    
+    def put(self, key: tuple, text: str, value: int | float):
+        """
+        Remembers an answer, forgetting the least recently used answers until the cache
+        fits in its memory budget again. Answers bigger than the whole budget are not kept.
+        
+        Args:
+            key (tuple): the operator and the two numbers of the math problem
+            text (str): the answer as it is shown to the user
+            value (int | float): the answer itself
+        """
+        size = sys.getsizeof(value) + sys.getsizeof(text) + sum(map(sys.getsizeof, key))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = (text, value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, old_size) = self.entries.popitem(last=False)
+                self.bytes -= old_size
+    
+    def clear(self):
+        """
+        Forgets every remembered answer, keeping the hit and miss counts.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+    
+    def describe(self) -> list[str]:
+        """
+        Reports how well the cache is doing.
+        
+        Returns:
+            list[str]: lines describing the cache's size, hits and misses
+        """
+        return [
+            "Answers remembered: " + str(len(self.entries)),
+            "Memory used: " + format(self.bytes, ",") + " of " + format(self.max_bytes, ",") + " bytes",
+            "Hits: " + str(self.hits),
+            "Misses: " + str(self.misses)
+            ]
+
+
+class Metrics:
+    """
+    Counts how often each route is visited and how often it gets invalid input, and keeps
+    histograms of how long each route and each stage of a calculation take. Everything
+    can be written out in the Prometheus text format, and recording does nothing once
+    the metrics are turned off.
+    """
+    
+    def __init__(self, buckets: tuple, enabled: bool = True):
+        self.buckets = buckets
+        self.enabled = enabled
+        self.requests = {}
+        self.invalid_inputs = {}
+        self.busy_rejections = 0
+        self.histograms = {}
+        self.lock = threading.Lock()
+    
+    def observe(self, name: str, label: str, seconds: float):
+        """
+        Adds one timing to a histogram.
+        
+        Args:
+            name (str): the name of the histogram
+            label (str): the label of the histogram, such as route="add_page"
+            seconds (float): how long it took
+        """
+        bucket = 0
+        while bucket < len(self.buckets) and seconds > self.buckets[bucket]:
+            bucket += 1
+        with self.lock:
+            histogram = self.histograms.get((name, label))
+            if histogram is None:
+                histogram = self.histograms[(name, label)] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][bucket] += 1
+            histogram[1] += seconds
+    
+    def record_request(self, route_name: str, seconds: float):
+        """
+        Counts a visit to a route and how long it took.
+        
+        Args:
+            route_name (str): the name of the route
+            seconds (float): how long the route took
+        """
+        if self.enabled:
+            with self.lock:
+                self.requests[route_name] = self.requests.get(route_name, 0) + 1
+            self.observe("calculator_request_seconds", 'route="' + route_name + '"', seconds)
+    
+    def record_invalid(self, route_name: str):
+        """
+        Counts a visit to a route that was given invalid input.
+        
+        Args:
+            route_name (str): the name of the route
+        """
+        if self.enabled:
+            with self.lock:
+                self.invalid_inputs[route_name] = self.invalid_inputs.get(route_name, 0) + 1
+    
+    def record_busy(self):
+        """
+        Counts a heavy request that was turned away because the server was busy.
+        """
+        if self.enabled:
+            with self.lock:
+                self.busy_rejections += 1
+    
+    def record_stages(self, started: float, parsed: float, computed: float, formatted: float):
+        """
+        Records how long each stage of a calculation took.
+        
+        Args:
+            started (float): when parsing the numbers started, from time.perf_counter()
+            parsed (float): when parsing the numbers finished
+            computed (float): when the arithmetic finished
+            formatted (float): when formatting the answer finished
+        """
+        if self.enabled:
+            self.observe("calculator_stage_seconds", 'stage="parse"', parsed - started)
+            self.observe("calculator_stage_seconds", 'stage="arithmetic"', computed - parsed)
+            self.observe("calculator_stage_seconds", 'stage="format"', formatted - computed)
+    
+    def render(self) -> str:
+        """
+        Writes out every metric in the Prometheus text format.
+        
+        Returns:
+            str: the metrics, one sample per line
+        """
+        lines = ["# TYPE calculator_requests_total counter"]
+        with self.lock:
+            for route_name, count in sorted(self.requests.items()):
+                lines.append('calculator_requests_total{route="' + route_name + '"} ' + str(count))
+            lines.append("# TYPE calculator_invalid_inputs_total counter")
+            for route_name, count in sorted(self.invalid_inputs.items()):
+                lines.append('calculator_invalid_inputs_total{route="' + route_name + '"} ' + str(count))
+            lines.append("# TYPE calculator_busy_rejections_total counter")
+            lines.append("calculator_busy_rejections_total " + str(self.busy_rejections))
+            written = set()
+            for (name, label), (counts, total) in sorted(self.histograms.items()):
+                if name not in written:
+                    lines.append("# TYPE " + name + " histogram")
+                    written.add(name)
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(name + "_bucket{" + label + ',le="' + str(bound) + '"} ' + str(cumulative))
+                lines.append(name + "_sum{" + label + "} " + repr(total))
+                lines.append(name + "_count{" + label + "} " + str(cumulative))
+        lines.append("# TYPE calculator_cache_hits_total counter")
+        lines.append("calculator_cache_hits_total " + str(result_cache.hits))
+        lines.append("# TYPE calculator_cache_misses_total counter")
+        lines.append("calculator_cache_misses_total " + str(result_cache.misses))
+        return "\n".join(lines) + "\n"
+
+
+calculator_metrics = Metrics(LATENCY_BUCKETS, METRICS_ENABLED)
+
+
+def timed(route_function):
+    """
+    Wraps a route so that every visit to it is counted and timed on the metrics page.
+    
+    Args:
+        route_function: the route to time
+    Returns:
+        the timed route, which takes the same arguments
+    """
+    @wraps(route_function)
+    def timed_route(*args, **kwargs):
+        if not calculator_metrics.enabled:
+            return route_function(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return route_function(*args, **kwargs)
+        finally:
+            calculator_metrics.record_request(route_function.__name__, time.perf_counter() - started)
+    return timed_route
+
+
+OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "**": compute_power,
+    "!": compute_factorial,
+    "C": compute_combinations,
+    "P": compute_permutations
+    }
+
+# The operators whose answers can get huge, how to predict their size, and how to
+# compute them without the budget
+ANSWER_BITS = {
+    "**": estimate_power_bits,
+    "!": estimate_factorial_bits,
+    "C": estimate_combinations_bits,
+    "P": estimate_permutations_bits
+    }
+EXACT_OPERATORS = {
+    "**": pow,
+    "!": factorial,
+    "C": combinations,
+    "P": permutations
+    }
+
+# The operators can also be named by the route that computes them
+ROUTE_OPERATORS = {
+    "add_page": "+",
+    "subtraction_page": "-",
+    "multiply_page": "*",
+    "division_page": "/",
+    "modulo_page": "%",
+    "exponent_page": "**",
+    "factorial_page": "!",
+    "combinations_page": "C",
+    "permutations_page": "P"
+    }
+
+result_cache = ResultCache(RESULT_CACHE_BYTES)
+
+
+def calculate(symbol: str, first: str, second: str) -> int | float | str | None:
+    """
+    Works out the answer to a math problem, reusing the remembered answer if the same
+    problem was asked before. Problems with long numbers, or whose answer is predicted to
+    be long, are worked out and previewed in a worker process.
+    
+    Args:
+        symbol (str): the operator to use, one of the keys of OPERATORS
+        first (str): the digits of the first number
+        second (str): the digits of the second number
+    Returns:
+        int | float | str | None: the answer, the preview of the answer if it is too long
+        to show at once, or None if it is too large to compute
+    """
+    key = (symbol, first, second)
+    answer = cached_answer(key)
+    if answer is not None:
+        return answer
+    heavy = len(first) + len(second) > WORKER_INPUT_DIGITS
+    if symbol in ANSWER_BITS and not heavy:
+        bits = ANSWER_BITS[symbol](parse_digits(first), parse_digits(second))
+        if bits > MAX_POWER_BITS:
+            return None
+        heavy = bits > CHEAP_ANSWER_BITS
+    if heavy and workers_available():
+        worked_out = compute_digits(OPERATORS[symbol], first, second, inline_digits=0)
+        if worked_out is None:
+            return None
+        value, text = worked_out
+        result_cache.put(key, text, value)
+        return text if is_long_answer(value) else value
+    started = time.perf_counter()
+    first_number, second_number = parse_digits(first), parse_digits(second)
+    parsed = time.perf_counter()
+    value = OPERATORS[symbol](first_number, second_number)
+    computed = time.perf_counter()
+    if value is None:
+        return None
+    answer = remember_answer(key, value)
+    calculator_metrics.record_stages(started, parsed, computed, time.perf_counter())
+    return answer
+
+
+def cached_answer(key: tuple) -> int | float | str | None:
+    """
+    Looks up the remembered answer to a math problem.
+    
+    Args:
+        key (tuple): what identifies the math problem
+    Returns:
+        int | float | str | None: the answer, the preview of the answer if it is too long
+        to show at once, or None if it is not remembered
+    """
+    cached = result_cache.get(key)
+    if cached is None:
+        return None
+    text, value = cached
+    if not is_long_answer(value):
+        return value
+    remember_full_answer(text, value)
+    return text
+
+
+def remember_answer(key: tuple, value: int | float) -> int | float | str:
+    """
+    Formats the answer to a math problem and remembers it in the result cache.
+    
+    Args:
+        key (tuple): what identifies the math problem
+        value (int | float): the answer
+    Returns:
+        int | float | str: the answer, or its preview if it is too long to show at once
+    """
+    text = format_answer(value)
+    result_cache.put(key, text, value)
+    if is_long_answer(value):
+        return text
+    return value
+
+
+EXPRESSION_TOKEN = re.compile(r"\s*(?:([0-9]+)|(\*\*|[-+*/%()]))")
+# How tightly each operator holds on to its numbers; "neg" is a minus sign in front of a number
+PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "%": 2, "neg": 3, "**": 4}
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(source: str) -> tuple:
+    """
+    Turns a typed math problem, such as "(34**2 % 97) / 3 + 5", into postfix order, where
+    every operator comes after the numbers it works on: (34, 2, "**", 97, "%", 3, "/", 5,
+    "+"). Compiled problems are remembered by their text, so a problem that is asked
+    again is not read again. Powers group from the right and a minus sign in front of a
+    number comes before everything but powers, the same as in Python.
+    
+    Args:
+        source (str): the math problem as the user typed it
+    Returns:
+        tuple: the numbers and operators of the problem in postfix order
+    Raises:
+        ValueError: if the text is not a math problem the calculator understands
+    """
+    source = source.strip()
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("the math problem is too long")
+    program = []
+    operators = []
+    expect_number = True
+    position = 0
+    while position < len(source):
+        match = EXPRESSION_TOKEN.match(source, position)
+        if match is None:
+            raise ValueError("unexpected character at position " + str(position))
+        position = match.end()
+        number, symbol = match.groups()
+        if number is not None or symbol == "(":
+            if not expect_number:
+                raise ValueError("missing an operator before position " + str(match.start()))
+            if number is not None:
+                program.append(parse_digits(number))
+                expect_number = False
+            else:
+                operators.append("(")
+        elif expect_number:
+            if symbol == "-":
+                operators.append("neg")
+            elif symbol != "+":
+                raise ValueError("missing a number before position " + str(match.start()))
+        elif symbol == ")":
+            while operators and operators[-1] != "(":
+                program.append(operators.pop())
+            if not operators:
+                raise ValueError("unmatched ) at position " + str(match.start()))
+            operators.pop()
+        else:
+            while (operators and operators[-1] != "("
+                   and (PRECEDENCE[operators[-1]] > PRECEDENCE[symbol]
+                        or PRECEDENCE[operators[-1]] == PRECEDENCE[symbol] and symbol != "**")):
+                program.append(operators.pop())
+            operators.append(symbol)
+            expect_number = True
+    if expect_number:
+        raise ValueError("the math problem ends without a number")
+    while operators:
+        symbol = operators.pop()
+        if symbol == "(":
+            raise ValueError("unmatched (")
+        program.append(symbol)
+    return tuple(program)
+
+
+class NeedsWorker(Exception):
+    """
+    Raised when a step of a typed math problem works on numbers too big to work out
+    without holding up the rest of the server.
+    """
+
+
+def step_bits(symbol: str, first: int | float, second: int | float) -> int:
+    """
+    Predicts how many bits of work one step of a typed math problem takes, from the size
+    of its whole numbers. Fractions are floats, which are always quick.
+    
+    Args:
+        symbol (str): the operator, one of the keys of OPERATORS
+        first (int | float): the number on the left
+        second (int | float): the number on the right
+    Returns:
+        int: about how many bits the biggest number in the step has
+    """
+    sizes = [abs(number).bit_length() for number in (first, second) if isinstance(number, int)]
+    if symbol == "**" and len(sizes) == 2 and second >= 0:
+        return estimate_power_bits(abs(first), second)
+    if symbol == "*":
+        return sum(sizes)
+    return max(sizes, default=0)
+
+
+def apply_operator(symbol: str, first: int | float, second: int | float) -> int | float | None:
+    """
+    Works out one step of a typed math problem, keeping every step within the same size
+    budget as the operator routes. Powers of fractions, and fractional or negative powers,
+    are small enough to work out with floats, but a float step that overflows to infinity
+    or not a number is too large.
+    
+    Args:
+        symbol (str): the operator, one of the keys of OPERATORS
+        first (int | float): the number on the left
+        second (int | float): the number on the right
+    Returns:
+        int | float | None: the answer to the step, or None if it is too large to compute
+    Raises:
+        ZeroDivisionError: if the step divides or takes the modulo by zero
+        ValueError: if the step has no real number answer
+    """
+    whole_numbers = isinstance(first, int) and isinstance(second, int)
+    try:
+        if symbol == "**" and whole_numbers and second >= 0:
+            power = compute_power(abs(first), second)
+            if power is not None and first < 0 and second % 2 == 1:
+                return -power
+            return power
+        if symbol == "**":
+            value = pow(first, second)
+        elif symbol == "*" and whole_numbers and first.bit_length() + second.bit_length() > MAX_POWER_BITS:
+            return None
+        else:
+            value = OPERATORS[symbol](first, second)
+    except OverflowError:
+        return None
+    if isinstance(value, complex):
+        raise ValueError("the answer is not a real number")
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def run_expression(program: tuple, inline_bits: int | None = None) -> int | float | None:
+    """
+    Works out a compiled math problem with a stack: numbers are pushed onto the stack,
+    and each operator takes its numbers off the top and pushes its answer back on.
+    
+    Args:
+        program (tuple): the math problem in postfix order, from compile_expression
+        inline_bits (int | None): the most bits a step may work on, or None for no limit
+    Returns:
+        int | float | None: the answer, or None if some step is too large to compute
+    Raises:
+        ZeroDivisionError: if some step divides or takes the modulo by zero
+        ValueError: if some step has no real number answer
+        NeedsWorker: if some step works on more than inline_bits bits
+    """
+    stack = []
+    for instruction in program:
+        if isinstance(instruction, int):
+            stack.append(instruction)
+        elif instruction == "neg":
+            stack[-1] = -stack[-1]
+        else:
+            second = stack.pop()
+            if inline_bits is not None and step_bits(instruction, stack[-1], second) > inline_bits:
+                raise NeedsWorker(instruction)
+            value = apply_operator(instruction, stack.pop(), second)
+            if value is None:
+                return None
+            stack.append(value)
+    return stack[0]
+
+
+def calculate_expression(source: str) -> int | float | str | None:
+    """
+    Works out a typed math problem, reusing the remembered answer if the same problem was
+    asked before. A problem with a step on numbers bigger than CHEAP_ANSWER_BITS is
+    worked out again from the start in a worker process, since even a single modulo or
+    division of huge numbers can hold up the rest of the server for a long time.
+    
+    Args:
+        source (str): the math problem as the user typed it
+    Returns:
+        int | float | str | None: the answer, the preview of the answer if it is too long
+        to show at once, or None if it is too large to compute
+    Raises:
+        ValueError: if the text is not a math problem the calculator understands
+        ZeroDivisionError: if the problem divides or takes the modulo by zero
+    """
+    key = ("expression", source)
+    answer = cached_answer(key)
+    if answer is not None:
+        return answer
+    started = time.perf_counter()
+    program = compile_expression(source)
+    parsed = time.perf_counter()
+    try:
+        value = run_expression(program, CHEAP_ANSWER_BITS if workers_available() else None)
+    except NeedsWorker:
+        worked_out = work_out_long(run_expression, program)
+        if worked_out is None:
+            return None
+        value, text = worked_out
+        result_cache.put(key, text, value)
+        return text if is_long_answer(value) else value
+    computed = time.perf_counter()
+    if value is None:
+        return None
+    answer = remember_answer(key, value)
+    calculator_metrics.record_stages(started, parsed, computed, time.perf_counter())
+    return answer
+
+
+SMALL_PRIMES = [number for number in range(2, 1000) if all(number % divisor for divisor in range(2, math.isqrt(number) + 1))]
+# Testing with these bases proves a number below this limit is prime
+DETERMINISTIC_PRIME_BASES = SMALL_PRIMES[:13]
+DETERMINISTIC_PRIME_LIMIT = 3317044064679887385961981
+
+
+def prime_test(number: int, deadline: float) -> str:
+    """
+    Tests whether a number is prime with the Miller-Rabin test. Numbers below
+    DETERMINISTIC_PRIME_LIMIT are tested with fixed bases that make the answer certain.
+    Bigger numbers are tested with random bases until PRIME_TEST_ROUNDS rounds pass or
+    time runs out, so their answer is only very likely. The deadline is checked before
+    every round, so a number that is too big for even one round in time is unknown.
+    
+    Args:
+        number (int): the number to test
+        deadline (float): the time.monotonic() time to stop testing by
+    Returns:
+        str: "prime", "not prime", "probably prime (passed N rounds)", or
+        "unknown, timed out"
+    """
+    if number < 2:
+        return "not prime"
+    for prime in SMALL_PRIMES:
+        if number % prime == 0:
+            return "prime" if number == prime else "not prime"
+    odd_part, twos = number - 1, 0
+    while odd_part % 2 == 0:
+        odd_part //= 2
+        twos += 1
+    if number < DETERMINISTIC_PRIME_LIMIT:
+        bases = DETERMINISTIC_PRIME_BASES
+    else:
+        bases = [random.randrange(2, number - 1) for _ in range(PRIME_TEST_ROUNDS)]
+    for rounds, base in enumerate(bases):
+        if time.monotonic() > deadline:
+            if rounds == 0:
+                return "unknown, timed out"
+            return "probably prime (passed " + str(rounds) + " rounds)"
+        witness = pow(base, odd_part, number)
+        if witness in (1, number - 1):
+            continue
+        for _ in range(twos - 1):
+            witness = witness * witness % number
+            if witness == number - 1:
+                break
+        else:
+            return "not prime"
+    if number < DETERMINISTIC_PRIME_LIMIT:
+        return "prime"
+    return "probably prime (passed " + str(len(bases)) + " rounds)"
+
+
+def pollard_rho(number: int, deadline: float) -> int | None:
+    """
+    Looks for a factor of an odd composite number with Brent's version of Pollard's rho
+    method, which finds a factor p after about sqrt(p) steps.
+    
+    Args:
+        number (int): the odd composite number to split
+        deadline (float): the time.monotonic() time to give up by
+    Returns:
+        int | None: a factor other than 1 and the number itself, or None if time ran out
+    """
+    for constant in range(1, number):
+        y, length, product, factor = 2, 1, 1, 1
+        while factor == 1:
+            x = y
+            for _ in range(length):
+                y = (y * y + constant) % number
+            steps = 0
+            while steps < length and factor == 1:
+                if time.monotonic() > deadline:
+                    return None
+                saved_y = y
+                for _ in range(min(128, length - steps)):
+                    y = (y * y + constant) % number
+                    product = product * abs(x - y) % number
+                factor = math.gcd(product, number)
+                steps += 128
+            length *= 2
+        if factor == number:
+            factor = 1
+            while factor == 1:
+                saved_y = (saved_y * saved_y + constant) % number
+                factor = math.gcd(abs(x - saved_y), number)
+        if factor != number:
+            return factor
+    return None
+
+
+def divide_small_primes(number: int) -> tuple[list[int], int]:
+    """
+    Divides every prime in SMALL_PRIMES out of a number, which is quick even for numbers
+    with many thousands of digits.
+    
+    Args:
+        number (int): the number to divide, at least 1
+    Returns:
+        tuple[list[int], int]: the small prime factors, from smallest to largest, and
+        what is left of the number
+    """
+    factors = []
+    for prime in SMALL_PRIMES:
+        while number % prime == 0:
+            factors.append(prime)
+            number //= prime
+    return factors, number
+
+
+def factorize(number: int, deadline: float) -> tuple[list[int], list[int]]:
+    """
+    Splits a number into its prime factors, first by dividing out small primes and then
+    with Pollard's rho method. When time runs out the factors found so far are given back
+    together with the parts that are still unfactored.
+    
+    Args:
+        number (int): the number to factor, at least 1
+        deadline (float): the time.monotonic() time to stop by
+    Returns:
+        tuple[list[int], list[int]]: the prime factors found, from smallest to largest,
+        and the composite parts that could not be split in time
+    """
+    factors, number = divide_small_primes(number)
+    pending = [number] if number > 1 else []
+    unfactored = []
+    while pending:
+        part = pending.pop()
+        verdict = prime_test(part, deadline)
+        if verdict == "unknown, timed out":
+            unfactored.append(part)
+            continue
+        if verdict != "not prime":
+            factors.append(part)
+            continue
+        factor = pollard_rho(part, deadline)
+        if factor is None:
+            unfactored.append(part)
+        else:
+            pending += [factor, part // factor]
+    return sorted(factors), sorted(unfactored)
+
+
+def factor_within_budget(number: int, deadline: float) -> tuple[list[int], list[int]]:
+    """
+    Factors a number for the factor page. Small primes are divided out right here, and a
+    part with at most NUMBER_THEORY_INLINE_BITS bits is factored here for a moment too,
+    which is all most numbers need. Whatever is left is factored in a worker process
+    that is stopped at the deadline, so the factors already found are never lost.
+    
+    Args:
+        number (int): the number to factor, at least 1
+        deadline (float): the time.monotonic() time to stop by
+    Returns:
+        tuple[list[int], list[int]]: the prime factors found, from smallest to largest,
+        and the composite parts that could not be split in time
+    """
+    factors, rest = divide_small_primes(number)
+    pending = [rest] if rest > 1 else []
+    if not workers_available():
+        found, pending = factorize(rest, deadline)
+        return sorted(factors + found), pending
+    if pending and rest.bit_length() <= NUMBER_THEORY_INLINE_BITS:
+        found, pending = factorize(rest, min(deadline, time.monotonic() + NUMBER_THEORY_INLINE_SECONDS))
+        factors += found
+    unfactored = []
+    for part in pending:
+        timeout = deadline - time.monotonic() + NUMBER_THEORY_GRACE_SECONDS
+        found, left = compute_in_worker(factorize, part, deadline, timeout=timeout) or ([], [part])
+        factors += found
+        unfactored += left
+    return sorted(factors), sorted(unfactored)
+
+
+def describe_factors(factors: list[int], unfactored: list[int]) -> str:
+    """
+    Writes out a factorization, such as "2^3 × 3 × 7", adding any parts that could not
+    be factored in time.
+    
+    Args:
+        factors (list[int]): the prime factors, from smallest to largest
+        unfactored (list[int]): the composite parts that could not be split
+    Returns:
+        str: the factorization
+    """
+    terms = []
+    for prime in sorted(set(factors)):
+        count = factors.count(prime)
+        terms.append(format_answer(prime) + ("^" + str(count) if count > 1 else ""))
+    for part in unfactored:
+        terms.append("(" + format_answer(part) + ", not factored in time)")
+    return " × ".join(terms) if terms else "1"
+
+
+
+def scaled_quotient(numerator: int, denominator: int, shift: int) -> int:
+    """
+    Computes floor(numerator * 10 ** shift / denominator), where shift may be negative.
+    
+    Args:
+        numerator (int): the number being divided
+        denominator (int): the number it is divided by
+        shift (int): the power of ten to scale the quotient by
+    Returns:
+        int: the scaled quotient, rounded down
+    """
+    if shift >= 0:
+        return numerator * power_of_ten(shift) // denominator
+    return numerator // (denominator * power_of_ten(-shift))
+
+
+def divide_significant(first: str, second: str, digits: int) -> str:
+    """
+    Divides two numbers typed in as digits, giving the first digits significant digits
+    of the answer. Like long division, it only reads as many leading digits of each
+    number as the answer needs: it divides the first digits + DIVISION_GUARD_DIGITS digits
+    of each, works out the smallest and largest quotients the unread digits could give,
+    and only reads twice as many digits when those do not agree. The cost follows the
+    number of digits asked for, not the length of the numbers.
+    
+    Args:
+        first (str): the digits of the number being divided
+        second (str): the digits of the number it is divided by, not all zeros
+        digits (int): how many significant digits to give
+    Returns:
+        str: the answer, ending in "..." when it was cut off at the digits asked for
+    """
+    first, second = first.lstrip("0"), second.lstrip("0")
+    if not first:
+        return "0"
+    exponent = (len(first) - len(first.rstrip("0"))) - (len(second) - len(second.rstrip("0")))
+    first, second = first.rstrip("0"), second.rstrip("0")
+    guard = DIVISION_GUARD_DIGITS
+    while True:
+        first_part, second_part = first[:digits + guard], second[:digits + guard]
+        numerator, denominator = parse_digits(first_part), parse_digits(second_part)
+        first_cut, second_cut = len(first) - len(first_part), len(second) - len(second_part)
+        shift = digits - 1 - (len(first_part) - len(second_part))
+        if scaled_quotient(numerator, denominator, shift) < power_of_ten(digits - 1):
+            shift += 1
+        low = scaled_quotient(numerator, denominator + (second_cut > 0), shift)
+        high = scaled_quotient(numerator + (first_cut > 0), denominator, shift)
+        if low == high:
+            break
+        guard *= 2
+    exact = (first_cut == 0 and second_cut == 0
+             and scaled_quotient(numerator, 1, shift) % denominator == 0 and shift >= 0)
+    return format_significant(low, exponent + first_cut - second_cut - shift, digits, exact)
+
+
+def format_significant(coefficient: int, exponent: int, digits: int, exact: bool) -> str:
+    """
+    Writes out coefficient * 10 ** exponent as a decimal. Answers that would need more
+    zeros than significant digits are written like "3.333 × 10^29" instead.
+    
+    Args:
+        coefficient (int): the significant digits of the answer
+        exponent (int): the power of ten the digits are scaled by
+        digits (int): how many significant digits were asked for
+        exact (bool): whether the answer is exactly the digits, with nothing cut off
+    Returns:
+        str: the decimal, ending in "..." when the answer was cut off
+    """
+    text = str(coefficient)
+    if exact:
+        exponent += len(text) - len(text.rstrip("0"))
+        text = text.rstrip("0")
+    point = len(text) + exponent
+    ending = "" if exact else "..."
+    if point > len(text) and (not exact or point > digits) or point <= -6:
+        return text[0] + ("." + text[1:] if len(text) > 1 else "") + ending + " × 10^" + str(point - 1)
+    if point > len(text):
+        return text + "0" * (point - len(text))
+    if point > 0:
+        return text[:point] + ("." + text[point:] if point < len(text) else "") + ending
+    return "0." + "0" * -point + text + ending
+
+
+def exact_fraction(numerator: int, denominator: int) -> tuple[int, int]:
+    """
+    Reduces a fraction to lowest terms.
+    
+    Args:
+        numerator (int): the top of the fraction
+        denominator (int): the bottom of the fraction, not 0
+    Returns:
+        tuple[int, int]: the top and bottom of the reduced fraction
+    """
+    divisor = math.gcd(numerator, denominator)
+    return numerator // divisor, denominator // divisor
+
+
+@dataclass
+class Asset:
+    """
+    An image that the calculator shows, loaded into memory once when the server starts.
+    """
+    url: str
+    content: bytes
+    content_type: str
+    etag: str
+    width: int | None
+    height: int | None
+
+
+class AssetStore:
+    """
+    Loads the calculator's images once and makes a smaller WebP copy of each one, named
+    after a hash of the original image so that its URL changes whenever the image does.
+    Browsers can then keep the images for a long time. Copies made by an earlier start
+    are reused if they can still be read as images, and the original image is used when
+    no copy can be made.
+    """
+    
+    def __init__(self, directory: str):
+        self.folder = os.path.dirname(os.path.abspath(__file__))
+        self.directory = directory
+        self.assets = {}
+        self.urls = {}
+        self.images = {}
+    
+    def add(self, name: str) -> Asset:
+        """
+        Loads an image and makes its optimized copy. The copy is written to a temporary
+        file that is then renamed into place, so a copy that was only partly written,
+        such as by a start that crashed or another server starting at the same time, is
+        never served.
+        
+        Args:
+            name (str): the file name of the image, next to this file
+        Returns:
+            Asset: the image as it is served
+        """
+        with io.open(os.path.join(self.folder, name), "rb") as image_file:
+            content = image_file.read()
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        url, content_type, width, height = name, "image/png", None, None
+        if PillowImage is not None:
+            picture = PillowImage.open(io.BytesIO(content))
+            width, height = picture.size
+            stem = os.path.splitext(name)[0].lower().replace(" ", "-")
+            optimized_url = self.directory + "/" + stem + "." + digest + ".webp"
+            optimized_path = os.path.join(self.folder, optimized_url)
+            try:
+                with io.open(optimized_path, "rb") as optimized_file:
+                    optimized = optimized_file.read()
+                PillowImage.open(io.BytesIO(optimized)).load()
+            except OSError:
+                optimized = None
+            try:
+                if optimized is None:
+                    buffer = io.BytesIO()
+                    picture.save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+                    optimized = buffer.getvalue()
+                    os.makedirs(os.path.dirname(optimized_path), exist_ok=True)
+                    descriptor, temporary_path = tempfile.mkstemp(".tmp", dir=os.path.dirname(optimized_path))
+                    try:
+                        with io.open(descriptor, "wb") as optimized_file:
+                            optimized_file.write(optimized)
+                        os.replace(temporary_path, optimized_path)
+                    except OSError:
+                        os.remove(temporary_path)
+                        raise
+                if len(optimized) < len(content):
+                    url, content, content_type = optimized_url, optimized, "image/webp"
+            except OSError:
+                pass
+        asset = Asset(url, content, content_type, '"' + hashlib.sha256(content).hexdigest()[:16] + '"',
+                      width, height)
+        self.assets[name] = asset
+        self.urls[url] = asset
+        return asset
+    
+    def image(self, name: str) -> Image:
+        """
+        Gives the component that shows an image, with its size so the page does not jump
+        around while it loads. The component is only made once and shared by every page.
+        
+        Args:
+            name (str): the file name of the image
+        Returns:
+            Image: the component showing the image's optimized copy
+        """
+        if name not in self.images:
+            asset = self.assets[name]
+            self.images[name] = Image(asset.url, asset.width, asset.height)
+        return self.images[name]
+    
+    def response(self, url: str, if_none_match: str = "") -> tuple | None:
+        """
+        Answers a request for an image from memory, for servers that can set their own
+        headers. A browser that already has the image is told it has not changed.
+        
+        Args:
+            url (str): the URL of the image, without the leading slash
+            if_none_match (str): the ETag the browser already has, if any
+        Returns:
+            tuple | None: the status, headers and body, or None if there is no such image
+        """
+        asset = self.urls.get(url)
+        if asset is None:
+            return None
+        headers = {
+            "Content-Type": asset.content_type,
+            "Cache-Control": "public, max-age=" + str(ASSET_MAX_AGE_SECONDS) + ", immutable",
+            "ETag": asset.etag
+            }
+        if asset.etag in if_none_match:
+            return 304, headers, b""
+        return 200, headers, asset.content
+
+
+site_assets = AssetStore(ASSET_DIRECTORY)
+site_assets.add("Math Operations.png")
+site_assets.add("error.png")
+
+
+@lru_cache(maxsize=SESSION_LIMIT)
+def session_buttons(session: str) -> dict:
+    """
+    Builds the buttons that are the same on every visit to a page, so that they are only
+    built once for each session instead of on every visit.
+    
+    Args:
+        session (str): the id of the user's session, or "" if they do not have one
+    Returns:
+        dict: the operator buttons of the index page and the history, restart and retry
+        buttons, by name
+    """
+    arguments = [Argument("session", session)] if session else []
+    return {
+        "operators": [
+            Button("Addition", add_page, arguments),
+            Button("Subtraction", subtraction_page, arguments),
+            Button("Multiplication", multiply_page, arguments),
+            Button("Division", division_page, arguments),
+            Button("Modulo", modulo_page, arguments),
+            Button("Exponential", exponent_page, arguments)
+            ],
+        "evaluate": Button("Evaluate", expression_page, arguments),
+        "more": Button("More Operators", more_operators, arguments),
+        "statistics": Button("History Statistics", history_stats, arguments),
+        "search": Button("Search History", search_history, arguments),
+        "number theory": [
+            Button("Modular Power", modular_power_page, arguments),
+            Button("Is It Prime?", prime_page, arguments),
+            Button("GCD", gcd_page, arguments),
+            Button("LCM", lcm_page, arguments),
+            Button("Prime Factors", factor_page, arguments),
+            Button("Factorial (n!)", factorial_page, arguments),
+            Button("Combinations (nCr)", combinations_page, arguments),
+            Button("Permutations (nPr)", permutations_page, arguments),
+            Button("Exact Division", exact_division_page, arguments)
+            ],
+        "history": Button("View Answer History", get_history, arguments),
+        "restart": Button("Restart here", index, arguments),
+        "retry": Button("Retry", index, arguments)
+        }
+
+
+def answer_page(state: State) -> Page:
+    """
+    Builds the page that shows the answer to a math problem, with a button to read the
+    whole answer when it is too long to show at once.
+    
+    Args:
+        state (State): the current state of the calculator
+    Returns:
+        Page: the answer page for the current result
+    """
+    content = ["The answer is: " + state.result]
+    if state.result in full_answers:
+        content.append(Button("View Full Answer", full_answer,
+                              [Argument("answer", state.result), Argument("part", 0)]
+                              + session_arguments(state)))
+    buttons = session_buttons(state.session)
+    content.append(buttons["history"])
+    content.append(buttons["restart"])
+    return Page(state, content)
+
+@route
+@timed
+def index(state: State, session: str = "") -> Page:
+    """
+    This is the home page of the calculator where the user can choose the type of operator
+    they would like to use
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: a varying page depending on the type of operator chosen
+    """
+    state = session_state(state, session)
+    return Page(state, [
+        "Welcome to Colin's Calculator!",
+        site_assets.image("Math Operations.png"),
+        "Input your first number",
+        TextBox("first", state.first_digit),
+        "Input your second number",
+        TextBox("second", state.second_digit),
+        "What operator would you like to use?",
+        *session_buttons(state.session)["operators"],
+        "Or type a whole math problem, such as (34**2 % 97) / 3 + 5",
+        TextBox("expression", ""),
+        session_buttons(state.session)["evaluate"],
+        session_buttons(state.session)["more"]
+        ])
+
+@route
+@timed
+def add_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The add page will appear when the user clicks the addition button on the index page
+    and it will add together 2 numbers that the user inputs. If the user does not input a
+    number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer = calculate("+", first, second)
+        state.result = str(answer)
+        state.answer_history.append(answer, "+", (first, second))
+    else:
+        calculator_metrics.record_invalid("add_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def subtraction_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The subtraction page will appear when the user clicks the subtraction button on the
+    index page and it will subtract the 2 numbers that the user inputs. If the user does not
+    input a number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer = calculate("-", first, second)
+        state.result = str(answer)
+        state.answer_history.append(answer, "-", (first, second))
+    else:
+        calculator_metrics.record_invalid("subtraction_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def multiply_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The multiply page will appear when the user clicks the multiplication button on the
+    index page and it will multiply the 2 numbers that the user inputs. If the user does not
+    input a number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer = calculate("*", first, second)
+        state.result = str(answer)
+        state.answer_history.append(answer, "*", (first, second))
+    else:
+        calculator_metrics.record_invalid("multiply_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def division_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The division page will appear when the user clicks the division button on the
+    index page and it will divide the 2 numbers that the user inputs. If the user does not
+    input a number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        if not second.strip("0"):
+            return undefined(state, state.session)
+        try:
+            answer = calculate("/", first, second)
+        except OverflowError:
+            return too_large(state, state.session)
+        state.result = str(answer)
+        state.answer_history.append(answer, "/", (first, second))
+    else:
+        calculator_metrics.record_invalid("division_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+    
+@route
+@timed
+def modulo_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The modulo page will appear when the user clicks the modulo button on the
+    index page and it take the first number input modulo the second number input.
+    If the user does not input a number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        if not second.strip("0"):
+            return undefined(state, state.session)
+        answer = calculate("%", first, second)
+        state.result = str(answer)
+        state.answer_history.append(answer, "%", (first, second))
+    else:
+        calculator_metrics.record_invalid("modulo_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+    
+@route
+@timed
+def exponent_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The exponent page will appear when the user clicks the exponetial button on the
+    index page and it will take the first number input to the power of the second number
+    input. If the user does not input a number, it will bring the user to the invalid input
+    page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer = calculate("**", first, second)
+        if answer is None:
+            return too_large(state, state.session)
+        state.result = str(answer)
+        state.answer_history.append(answer, "**", (first, second))
+    else:
+        calculator_metrics.record_invalid("exponent_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def expression_page(state: State, expression: str, session: str = "") -> Page:
+    """
+    The expression page will appear when the user clicks the evaluate button on the
+    index page and it will work out the whole math problem the user typed in, so several
+    steps can be done at once. If the user does not type in a math problem the calculator
+    understands, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        expression (str): the math problem the user typed in
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the math problem cannot be worked out, or the get_history
+        page if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    try:
+        answer = calculate_expression(expression)
+    except ZeroDivisionError:
+        return undefined(state, state.session)
+    except ValueError:
+        calculator_metrics.record_invalid("expression_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    if answer is None:
+        return too_large(state, state.session)
+    state.result = str(answer)
+    state.answer_history.append(answer, "expression", (expression,))
+    return answer_page(state)
+
+@route
+@timed
+def more_operators(state: State, session: str = "") -> Page:
+    """
+    The more operators page will appear when the user clicks the more operators button on
+    the index page and lets the user choose an operator for number theory problems, which
+    need up to three numbers.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: a varying page depending on the type of operator chosen
+    """
+    state = session_state(state, session)
+    return Page(state, [
+        "More operators for whole numbers",
+        "Input your first number",
+        TextBox("first", state.first_digit),
+        "Input your second number",
+        TextBox("second", state.second_digit),
+        "Input the modulus, for the modular power",
+        TextBox("modulus", ""),
+        "Input how many significant digits exact division should give, or leave it empty for a fraction",
+        TextBox("precision", ""),
+        "What operator would you like to use? Is It Prime?, Prime Factors and Factorial only use the first number.",
+        *session_buttons(state.session)["number theory"],
+        session_buttons(state.session)["restart"]
+        ])
+
+@route
+@timed
+def modular_power_page(state: State, first: str, second: str, modulus: str, session: str = "") -> Page:
+    """
+    The modular power page will appear when the user clicks the modular power button on
+    the more operators page and it will take the first number to the power of the second
+    number modulo the modulus, without ever computing the whole power. Long numbers are
+    worked out in a worker process within the time budget. If the user does not input
+    numbers, it will bring the user to the invalid input page, and if the modulus is 0,
+    to the undefined page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, the undefined page if the
+        modulus is 0, the too large page if it cannot be worked out in time, or the
+        get_history page if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit() and modulus.isdigit():
+        if not modulus.strip("0"):
+            return undefined(state, state.session)
+        answer, state.result = compute_digits(pow, first, second, modulus,
+                                              inline_digits=MODULAR_POWER_INLINE_DIGITS) or (None, "")
+        if answer is None:
+            return too_large(state, state.session)
+        state.answer_history.append(state.result if is_long_answer(answer) else answer, "modpow",
+                                    (first, second, modulus))
+    else:
+        calculator_metrics.record_invalid("modular_power_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def prime_page(state: State, first: str, session: str = "") -> Page:
+    """
+    The prime page will appear when the user clicks the is it prime button on the more
+    operators page and it will test whether the first number is prime. Very big numbers
+    are tested until the time budget runs out, and the page says how sure the answer is,
+    or that it is unknown if the test timed out. If the user does not input a number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit():
+        number = parse_digits(first)
+        deadline = time.monotonic() + NUMBER_THEORY_SECONDS
+        if number.bit_length() > NUMBER_THEORY_INLINE_BITS:
+            timeout = deadline - time.monotonic() + NUMBER_THEORY_GRACE_SECONDS
+            verdict = compute_in_worker(prime_test, number, deadline, timeout=timeout) or "unknown, timed out"
+        else:
+            verdict = prime_test(number, deadline)
+        state.result = format_answer(number) + " is " + verdict
+        state.answer_history.append(state.result, "prime", (first,))
+    else:
+        calculator_metrics.record_invalid("prime_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def gcd_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The gcd page will appear when the user clicks the gcd button on the more operators
+    page and it will find the greatest common divisor of the 2 numbers that the user
+    inputs. If the user does not input a number, it will bring the user to the invalid
+    input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, the too large page if the
+        numbers are too long to work with in time, or the get_history page if the user
+        clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer, state.result = compute_digits(math.gcd, first, second) or (None, "")
+        if answer is None:
+            return too_large(state, state.session)
+        state.answer_history.append(state.result if is_long_answer(answer) else answer, "gcd", (first, second))
+    else:
+        calculator_metrics.record_invalid("gcd_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def lcm_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The lcm page will appear when the user clicks the lcm button on the more operators
+    page and it will find the least common multiple of the 2 numbers that the user
+    inputs. If the user does not input a number, it will bring the user to the invalid
+    input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, the too large page if the
+        numbers are too long to work with in time, or the get_history page if the user
+        clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer, state.result = compute_digits(math.lcm, first, second) or (None, "")
+        if answer is None:
+            return too_large(state, state.session)
+        state.answer_history.append(state.result if is_long_answer(answer) else answer, "lcm", (first, second))
+    else:
+        calculator_metrics.record_invalid("lcm_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def factor_page(state: State, first: str, session: str = "") -> Page:
+    """
+    The factor page will appear when the user clicks the prime factors button on the
+    more operators page and it will split the first number into its prime factors. If the
+    time budget runs out, it shows the factors found so far and the part that is left. If
+    the user does not input a number that is at least 1, it will bring the user to the
+    invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and first.strip("0") != "":
+        number, deadline = parse_digits(first), time.monotonic() + NUMBER_THEORY_SECONDS
+        factors, unfactored = factor_within_budget(number, deadline)
+        state.result = describe_factors(factors, unfactored)
+        state.answer_history.append(state.result, "factor", (first,))
+    else:
+        calculator_metrics.record_invalid("factor_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def factorial_page(state: State, first: str, session: str = "") -> Page:
+    """
+    The factorial page will appear when the user clicks the factorial button on the more
+    operators page and it will multiply together every whole number from 1 up to the first
+    number input. If the user does not input a number, it will bring the user to the
+    invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, the too large page if the
+        answer is too big, or the get_history page if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit():
+        answer = calculate("!", first, "0")
+        if answer is None:
+            return too_large(state, state.session)
+        state.result = str(answer)
+        state.answer_history.append(answer, "!", (first,))
+    else:
+        calculator_metrics.record_invalid("factorial_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def combinations_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The combinations page will appear when the user clicks the combinations button on the
+    more operators page and it will count the ways to choose the second number of things
+    out of the first number of things, when order does not matter. If the user does not
+    input a number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, the too large page if the
+        answer is too big, or the get_history page if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer = calculate("C", first, second)
+        if answer is None:
+            return too_large(state, state.session)
+        state.result = str(answer)
+        state.answer_history.append(answer, "C", (first, second))
+    else:
+        calculator_metrics.record_invalid("combinations_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def permutations_page(state: State, first: str, second: str, session: str = "") -> Page:
+    """
+    The permutations page will appear when the user clicks the permutations button on the
+    more operators page and it will count the ways to line up the second number of things
+    out of the first number of things, when order matters. If the user does not input a
+    number, it will bring the user to the invalid input page.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, the too large page if the
+        answer is too big, or the get_history page if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    if first.isdigit() and second.isdigit():
+        answer = calculate("P", first, second)
+        if answer is None:
+            return too_large(state, state.session)
+        state.result = str(answer)
+        state.answer_history.append(answer, "P", (first, second))
+    else:
+        calculator_metrics.record_invalid("permutations_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    return answer_page(state)
+
+@route
+@timed
+def exact_division_page(state: State, first: str, second: str, precision: str, session: str = "") -> Page:
+    """
+    The exact division page will appear when the user clicks the exact division button on
+    the more operators page and it will divide the first number by the second number
+    without any round-off. If the user asks for a number of significant digits, it gives
+    that many digits of the decimal answer; otherwise it gives the answer as a fraction in
+    lowest terms. If the user does not input numbers, it will bring the user to the invalid
+    input page, and dividing by zero brings the user to the undefined page.
+    
+    Args:
+        state (State): the current state of the calculator
+        precision (str): how many significant digits to give, or "" for a fraction
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem, the
+        invalid input page if the user does not input numbers, or the get_history page
+        if the user clicks the answer history button
+    """
+    state = session_state(state, session)
+    precision = precision.strip()
+    if not (first.isdigit() and second.isdigit()
+            and (precision == "" or precision.isdigit() and 0 < int(precision) <= MAX_DIVISION_DIGITS)):
+        calculator_metrics.record_invalid("exact_division_page")
+        state.valid_input = False
+        return invalid(state, state.session)
+    if not second.strip("0"):
+        return undefined(state, state.session)
+    if precision:
+        state.result = divide_significant(first, second, int(precision))
+        state.answer_history.append(state.result, "exact /", (first, second, precision))
+        return answer_page(state)
+    numerator, denominator = parse_digits(first), parse_digits(second)
+    if max(numerator.bit_length(), denominator.bit_length()) > EXACT_FRACTION_INLINE_BITS:
+        fraction = compute_in_worker(exact_fraction, numerator, denominator)
+        if fraction is None:
+            return too_large(state, state.session)
+    else:
+        fraction = exact_fraction(numerator, denominator)
+    state.result = format_answer(fraction[0]) + ("/" + format_answer(fraction[1]) if fraction[1] != 1 else "")
+    state.answer_history.append(state.result, "exact /", (first, second))
+    return answer_page(state)
+
+@route
+@timed
+def get_history(state: State, page: int = 0, session: str = "") -> Page:
+    """
+    The get_history page will appear when the user clicks the answer history button
+    after completing a math problem and shows the user their past answers that they had
+    computed, one page at a time.
+    
+    Args:
+        state (State): the current state of the calculator
+        page (int): which page of the history to show, starting from 0
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the next or previous page of their history, or to the
+        index page to compute another math problem
+    """
+    state = session_state(state, session)
+    pages = state.answer_history.page_count()
+    page = min(max(page, 0), pages - 1)
+    answers = state.answer_history.page(page)
+    content = ["Your answer history is: " + "".join(str(answer) + ", " for answer in answers)]
+    if pages > 1:
+        content.append("Page " + str(page + 1) + " of " + str(pages))
+    if page > 0:
+        content.append(Button("Previous Page", get_history, [Argument("page", page - 1)] + session_arguments(state)))
+    if page + 1 < pages:
+        content.append(Button("Next Page", get_history, [Argument("page", page + 1)] + session_arguments(state)))
+    content.append(session_buttons(state.session)["statistics"])
+    content.append(session_buttons(state.session)["restart"])
+    return Page(state, content)
+
+@route
+@timed
+def history_stats(state: State, session: str = "") -> Page:
+    """
+    The history stats page will appear when the user clicks the history statistics button
+    on the get_history page and shows how many of their answers are numbers, along with
+    the total, smallest, largest and average of those answers. It also lets the user
+    search their history by operator or by answer.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the search results, or to the index page to compute
+        another math problem
+    """
+    state = session_state(state, session)
+    statistics = state.answer_history.statistics()
+    content = ["Answers that are numbers: " + str(statistics["count"])]
+    if statistics["count"]:
+        content += ["Total: " + str(statistics["total"]),
+                    "Smallest: " + str(statistics["smallest"]),
+                    "Largest: " + str(statistics["largest"]),
+                    "Average: " + str(statistics["average"])]
+    return Page(state, content + [
+        "Search by operator, such as ** or gcd",
+        TextBox("operator", ""),
+        "or by answer",
+        TextBox("answer", ""),
+        session_buttons(state.session)["search"],
+        session_buttons(state.session)["restart"]
+        ])
+
+@route
+@timed
+def search_history(state: State, operator: str, answer: str, session: str = "") -> Page:
+    """
+    The search history page will appear when the user clicks the search history button on
+    the history stats page and lists the problems in their history that used the operator
+    and gave the answer they typed in. A box that is left empty matches anything.
+    
+    Args:
+        state (State): the current state of the calculator
+        operator (str): the operator to look for, or "" for any operator
+        answer (str): the answer to look for, or "" for any answer
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the history stats page, or to the index page to compute
+        another math problem
+    """
+    state = session_state(state, session)
+    records = state.answer_history.find(operator.strip() or None, result_key(answer) if answer.strip() else None)
+    content = ["Found " + str(len(records)) + " matching answers"]
+    content += [record.describe() for record in records]
+    content.append(session_buttons(state.session)["statistics"])
+    content.append(session_buttons(state.session)["restart"])
+    return Page(state, content)
+
+@route
+@timed
+def invalid(state: State, session: str = "") -> Page:
+    """
+    The invalid page will appear with an error message when the user inputs anything
+    other than numbers into the first or second number of the state and remind the
+    user that they can only input numbers.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem
+    """
+    state = session_state(state, session)
+    return Page(state, [
+        "Invalid Input! You may only input numbers. Try Again.",
+        site_assets.image("error.png"),
+        session_buttons(state.session)["retry"]
+        ])
+
+def write_out_answer(value: int | LongAnswer) -> str | None:
+    """
+    Writes out every digit of a long answer for the full answer page. Answers with more
+    than CHEAP_ANSWER_BITS bits are written out in a worker process, working them out
+    again first if they were left behind in one.
+    
+    Args:
+        value (int | LongAnswer): the answer, or how to work it out again
+    Returns:
+        str | None: the digits of the answer, or None if it took too long
+    """
+    if isinstance(value, LongAnswer):
+        return compute_in_worker(value.write_out)
+    if value.bit_length() <= CHEAP_ANSWER_BITS:
+        return int_to_decimal(value)
+    return compute_in_worker(int_to_decimal, value)
+
+@route
+@timed
+def full_answer(state: State, answer: str, part: int, session: str = "") -> Page:
+    """
+    The full answer page will appear when the user clicks the view full answer button on
+    an answer that was too long to show at once. It shows one part of the answer's digits
+    at a time, and the digits are only worked out the first time the answer is viewed,
+    in a worker process when the answer is long.
+    
+    Args:
+        state (State): the current state of the calculator
+        answer (str): the preview of the answer to show in full
+        part (int): which part of the answer's digits to show, starting from 0
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: the next or previous part of the answer, or the index page to compute
+        another math problem
+    """
+    state = session_state(state, session)
+    if answer not in full_answers:
+        return Page(state, [
+            "That answer is no longer available. Try computing it again.",
+            session_buttons(state.session)["restart"]
+            ])
+    digits = full_answers[answer]
+    if not isinstance(digits, str):
+        digits = write_out_answer(digits)
+        if digits is None:
+            return Page(state, [
+                "That answer took too long to write out. Try again later.",
+                session_buttons(state.session)["restart"]
+                ])
+        full_answers[answer] = digits
+    parts = math.ceil(len(digits) / ANSWER_PART_DIGITS)
+    part = min(max(part, 0), parts - 1)
+    start = part * ANSWER_PART_DIGITS
+    content = [
+        "Part " + str(part + 1) + " of " + str(parts) + " of the answer " + answer + ":",
+        digits[start:start + ANSWER_PART_DIGITS]
+        ]
+    if part > 0:
+        content.append(Button("Previous Part", full_answer,
+                              [Argument("answer", answer), Argument("part", part - 1)]
+                              + session_arguments(state)))
+    if part + 1 < parts:
+        content.append(Button("Next Part", full_answer,
+                              [Argument("answer", answer), Argument("part", part + 1)]
+                              + session_arguments(state)))
+    content.append(session_buttons(state.session)["restart"])
+    return Page(state, content)
+
+@route
+@timed
+def cache_stats(state: State, session: str = "") -> Page:
+    """
+    The cache stats page shows how many answers the calculator remembers and how often
+    a remembered answer was reused instead of computing it again.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem
+    """
+    state = session_state(state, session)
+    return Page(state, result_cache.describe() + [
+        session_buttons(state.session)["restart"]
+        ])
+
+@route
+def metrics(state: State, session: str = "") -> Page:
+    """
+    The metrics page shows how often each page of the calculator was visited, how often
+    it was given invalid input and how long it took, written in the Prometheus text format.
+    Drafter can only answer with HTML pages, so here the text is shown inside the page
+    for people to read and cannot be scraped by Prometheus. The serve command answers
+    /metrics with the bare text as text/plain, which Prometheus can scrape.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem
+    """
+    state = session_state(state, session)
+    return Page(state, [
+        PreformattedText(calculator_metrics.render()),
+        session_buttons(state.session)["restart"]
+        ])
+
+@route
+@timed
+def undefined(state: State, session: str = "") -> Page:
+    """
+    The undefined page will appear with an error message when the user's math problem
+    divides by zero or takes the modulo by zero, which has no answer.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem
+    """
+    state = session_state(state, session)
+    return Page(state, [
+        "Undefined! You can't divide by zero, or take the modulo by zero. Try Again.",
+        site_assets.image("error.png"),
+        session_buttons(state.session)["retry"]
+        ])
+
+@route
+@timed
+def too_large(state: State, session: str = "") -> Page:
+    """
+    The too large page will appear with an error message when the answer to the user's
+    math problem would be too big for the calculator to work out, such as a big number
+    raised to a huge power.
+    
+    Args:
+        state (State): the current state of the calculator
+        session (str): the id of the user's session, if they have one
+    Returns:
+        Page: returns the user to the index page to compute another math problem
+    """
+    state = session_state(state, session)
+    return Page(state, [
+        "Result too large! That answer has too many digits to compute. Try smaller numbers.",
+        site_assets.image("error.png"),
+        session_buttons(state.session)["retry"]
+        ])
+
+def exact_answer(symbol: str, first: str, second: str) -> int | float | str:
+    """
+    Works out one math problem with Python's exact whole numbers.
+    
+    Args:
+        symbol (str): the operator to use, one of the keys of OPERATORS
+        first (str): the digits of the first number
+        second (str): the digits of the second number
+    Returns:
+        int | float | str: the answer, or "invalid", "too large" or "undefined" when there
+        is no answer
+    """
+    try:
+        first_number = parse_digits(first)
+        second_number = parse_digits(second)
+    except ValueError:
+        return "invalid"
+    if symbol in ANSWER_BITS:
+        if ANSWER_BITS[symbol](first_number, second_number) > MAX_POWER_BITS:
+            return "too large"
+        return EXACT_OPERATORS[symbol](first_number, second_number)
+    try:
+        return OPERATORS[symbol](first_number, second_number)
+    except ZeroDivisionError:
+        return "undefined"
+    except OverflowError:
+        return "too large"
+
+
+def bulk_calculate(symbol: str, firsts: list[str], seconds: list[str]) -> list:
+    """
+    Works out the same operation for whole columns of numbers at once. Rows whose numbers
+    are short enough are computed together as NumPy array operations, and only the rows
+    whose answers could overflow a 64-bit integer, or lose precision as a float, are
+    worked out one at a time with exact Python numbers. The answers are the same as the
+    operator routes give, and dividing or taking the modulo by zero gives "undefined".
+    Without NumPy every row is worked out exactly.
+    
+    Args:
+        symbol (str): the operator to use, one of the keys of OPERATORS
+        firsts (list[str]): the digits of the first number of each row
+        seconds (list[str]): the digits of the second number of each row
+    Returns:
+        list: the answer to each row, or "invalid", "too large" or "undefined" for rows
+        without an answer
+    """
+    answers = [None] * len(firsts)
+    if numpy is not None and firsts:
+        first_lengths = numpy.fromiter(map(len, firsts), numpy.int64, len(firsts))
+        second_lengths = numpy.fromiter(map(len, seconds), numpy.int64, len(seconds))
+        rows = numpy.flatnonzero((first_lengths <= INT64_DIGITS) & (second_lengths <= INT64_DIGITS))
+        try:
+            a = numpy.array(firsts, dtype=object)[rows].astype(str).astype(numpy.int64)
+            b = numpy.array(seconds, dtype=object)[rows].astype(str).astype(numpy.int64)
+        except ValueError:
+            rows = rows[:0]
+        if len(rows) > 0:
+            with numpy.errstate(all="ignore"):
+                if symbol in ("/", "%"):
+                    for row in rows[b == 0].tolist():
+                        answers[row] = "undefined"
+                if symbol == "+":
+                    safe, values = numpy.full(len(rows), True), a + b
+                elif symbol == "-":
+                    safe, values = numpy.full(len(rows), True), a - b
+                elif symbol == "*":
+                    safe = (b == 0) | (a <= INT64_MAX // numpy.maximum(b, 1))
+                    values = a * b
+                elif symbol == "/":
+                    safe = (a <= EXACT_FLOAT_MAX) & (b <= EXACT_FLOAT_MAX) & (b != 0)
+                    values = a.astype(numpy.float64) / numpy.maximum(b, 1).astype(numpy.float64)
+                elif symbol == "%":
+                    safe = b != 0
+                    values = a % numpy.maximum(b, 1)
+                elif symbol == "**":
+                    safe = (a <= 1) | (b * numpy.log2(numpy.maximum(a, 1).astype(numpy.float64)) < 62)
+                    values = numpy.power(a, numpy.where(safe, b, 0))
+                else:
+                    safe, values = numpy.full(len(rows), False), a
+            for row, value in zip(rows[safe].tolist(), values[safe].tolist()):
+                answers[row] = value
+    for row, answer in enumerate(answers):
+        if answer is None:
+            answers[row] = exact_answer(symbol, firsts[row], seconds[row])
+    return answers
+
+
+def evaluate_row(first: str, symbol: str, second: str) -> str:
+    """
+    Works out one math problem from a batch file the same way the operator routes would,
+    and writes out every digit of the answer.
+    
+    Args:
+        first (str): the first number
+        symbol (str): the operator, either its symbol or the name of its route
+        second (str): the second number
+    Returns:
+        str: the answer, or "invalid", "unknown operator", "too large" or "undefined"
+        when the routes would not give an answer
+    """
+    return evaluate_rows([(first, symbol, second)])[0]
+
+
+def evaluate_rows(rows: list[tuple]) -> list[str]:
+    """
+    Works out a chunk of math problems from a batch file, checking each row the same way
+    the operator routes would and then computing all the rows that use the same operator
+    together.
+    
+    Args:
+        rows (list[tuple]): the first number, operator and second number of each problem
+    Returns:
+        list[str]: the answers, in the same order as the rows
+    """
+    answers = [None] * len(rows)
+    groups = {}
+    for row, (first, symbol, second) in enumerate(rows):
+        symbol = ROUTE_OPERATORS.get(symbol, symbol)
+        if not (first.isdigit() and second.isdigit() and symbol):
+            answers[row] = "invalid"
+        elif symbol not in OPERATORS:
+            answers[row] = "unknown operator"
+        else:
+            groups.setdefault(symbol, []).append(row)
+    for symbol, group in groups.items():
+        values = bulk_calculate(symbol, [rows[row][0] for row in group], [rows[row][2] for row in group])
+        for row, value in zip(group, values):
+            if isinstance(value, int):
+                value = int_to_decimal(value)
+            answers[row] = str(value)
+    return answers
+
+
+def read_batch_rows(lines, kind: str):
+    """
+    Reads the math problems in a batch file one at a time, skipping blank lines and a
+    CSV header row. A row that cannot be read, such as a CSV row with too few fields or
+    a line that is not a JSON object, is still given back with its missing fields left
+    empty, so it is answered as invalid instead of stopping the whole batch.
+    
+    Args:
+        lines: the open batch file
+        kind (str): "csv" or "jsonl"
+    Returns:
+        an iterator of (first, operator, second) string tuples
+    """
+    if kind == "jsonl":
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                yield line.strip(), "", ""
+                continue
+            yield tuple(str(row.get(key, "")) for key in ("first", "operator", "second"))
+        return
+    for number, row in enumerate(csv.reader(lines)):
+        if not row:
+            continue
+        if number == 0 and row[0].strip().lower() == "first":
+            continue
+        fields = [field.strip() for field in row[:3]]
+        yield tuple(fields + [""] * (3 - len(fields)))
+
+
+def write_batch_rows(output, kind: str, rows: list[tuple], answers: list[str]):
+    """
+    Writes a chunk of math problems and their answers to the batch output.
+    
+    Args:
+        output: the open output file
+        kind (str): "csv" or "jsonl"
+        rows (list[tuple]): the first number, operator and second number of each problem
+        answers (list[str]): the answer to each problem
+    """
+    if kind == "jsonl":
+        for (first, symbol, second), answer in zip(rows, answers):
+            output.write(json.dumps({"first": first, "operator": symbol, "second": second,
+                                     "result": answer}) + "\n")
+    else:
+        writer = csv.writer(output)
+        for row, answer in zip(rows, answers):
+            writer.writerow(row + (answer,))
+
+
+def chunked(rows, size: int):
+    """
+    Groups rows into lists of at most size rows without reading ahead any further.
+    
+    Args:
+        rows: an iterator of rows
+        size (int): the most rows in each group
+    Returns:
+        an iterator of lists of rows
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(arguments: list[str]) -> int:
+    """
+    Runs a file of math problems through the calculator without the website, writing the
+    answers out in the same order as the problems as soon as they are ready. Chunks of
+    problems are worked out in parallel by worker processes, and only a few chunks per
+    worker are held in memory at a time, so files of any size can be run.
+    
+    Args:
+        arguments (list[str]): the command line arguments after "batch"
+    Returns:
+        int: the exit status, 0 when the whole file was run
+    """
+    parser = argparse.ArgumentParser(prog="batch",
+                                     description="Run a CSV or JSONL file of (first, operator, second) rows through the calculator.")
+    parser.add_argument("input", nargs="?", default="-", help="the file to read, or - for standard input")
+    parser.add_argument("-o", "--output", default="-", help="the file to write, or - for standard output")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="the file format, guessed from the input name if left out")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="how many worker processes to use")
+    parser.add_argument("--chunk-rows", type=int, default=BATCH_CHUNK_ROWS, help="how many rows each worker evaluates at a time")
+    options = parser.parse_args(arguments)
+    kind = options.format or ("jsonl" if options.input.endswith((".jsonl", ".ndjson")) else "csv")
+    lines = sys.stdin if options.input == "-" else io.open(options.input, newline="")
+    output = sys.stdout if options.output == "-" else io.open(options.output, "w", newline="")
+    chunks = chunked(read_batch_rows(lines, kind), options.chunk_rows)
+    try:
+        if options.workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            for rows in chunks:
+                write_batch_rows(output, kind, rows, evaluate_rows(rows))
+            return 0
+        context = multiprocessing.get_context("fork")
+        with concurrent.futures.ProcessPoolExecutor(options.workers, mp_context=context) as pool:
+            pending = collections.deque()
+            for rows in chunks:
+                pending.append((rows, pool.submit(evaluate_rows, rows)))
+                if len(pending) >= options.workers * 2:
+                    rows, answers = pending.popleft()
+                    write_batch_rows(output, kind, rows, answers.result())
+            while pending:
+                rows, answers = pending.popleft()
+                write_batch_rows(output, kind, rows, answers.result())
+        return 0
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+def benchmark_state(history_length: int = 0) -> State:
+    """
+    Makes a state for a benchmark with an answer history of the given length.
+    
+    Args:
+        history_length (int): how many answers are in the history
+    Returns:
+        State: a state that is not part of any session
+    """
+    history = AnswerHistory(range(history_length), capacity=max(history_length, HISTORY_CAPACITY))
+    return State("", "", history, True, "")
+
+
+@lru_cache(maxsize=1)
+def history_benchmark_state(history_length: int) -> State:
+    """
+    Makes the state for a history benchmark once, since viewing the history does not
+    change the state and long histories are slow to build.
+    
+    Args:
+        history_length (int): how many answers are in the history
+    Returns:
+        State: a state that is not part of any session
+    """
+    return benchmark_state(history_length)
+
+
+def benchmark_workloads() -> list[tuple]:
     """
-    first_digit: str
-    second_digit: str
-    answer_history: list[str]
-    valid_input: bool
-    result: str
+    Lists the benchmarks, each of which visits one route with one size of input. The
+    operator benchmarks forget remembered answers first so that they measure the real
+    work, except for the one that measures a remembered answer.
     
-@route
-def index(state: State) -> Page:
+    Returns:
+        list[tuple]: the name of each benchmark, how many times to run it, how to make
+        its state, and the visit to time
     """
-    This is the home page of the calculator where the user can choose the type of operator
-    they would like to use
+    small = ("4", "5")
+    thousand = ("7" * 1000, "3" * 1000)
+    hundred_thousand = ("7" * 100000, "3" * 100000)
+    
+    def operator_visit(route_function, numbers: tuple):
+        def visit(state: State):
+            result_cache.clear()
+            route_function(state, *numbers)
+        return visit
+    
+    workloads = [
+        ("index", 2000, benchmark_state, index),
+        ("invalid", 2000, benchmark_state, lambda state: add_page(state, "number", "2")),
+        ("add_page cached", 2000, benchmark_state, lambda state: add_page(state, *small))
+        ]
+    for route_function in [add_page, subtraction_page, multiply_page, division_page, modulo_page, exponent_page]:
+        workloads.append((route_function.__name__ + " small", 2000, benchmark_state,
+                          operator_visit(route_function, small)))
+    for route_function in [add_page, subtraction_page, multiply_page, modulo_page]:
+        workloads.append((route_function.__name__ + " 1k digits", 200, benchmark_state,
+                          operator_visit(route_function, thousand)))
+        workloads.append((route_function.__name__ + " 100k digits", 5, benchmark_state,
+                          operator_visit(route_function, hundred_thousand)))
+    workloads += [
+        ("exponent_page 9^100000", 20, benchmark_state, operator_visit(exponent_page, ("9", "100000"))),
+        ("exponent_page 9^1000000", 3, benchmark_state, operator_visit(exponent_page, ("9", "1000000"))),
+        ("exponent_page too large", 2000, benchmark_state, operator_visit(exponent_page, ("9", "99999999"))),
+        ("factorial_page 100000!", 5, benchmark_state, operator_visit(factorial_page, ("100000",))),
+        ("combinations_page 1000000C500000", 3, benchmark_state,
+         operator_visit(combinations_page, ("1000000", "500000"))),
+        ("permutations_page 100000P50000", 5, benchmark_state,
+         operator_visit(permutations_page, ("100000", "50000")))
+        ]
+    for history_length in [10, 10000, 1000000]:
+        workloads.append(("get_history " + str(history_length) + " answers", 200,
+                          lambda length=history_length: history_benchmark_state(length), get_history))
+    return workloads
+
+
+def percentile(timings: list[float], fraction: float) -> float:
+    """
+    Finds the timing that the given fraction of timings are at or below.
     
     Args:
-        state (State): the current state of the calculator
+        timings (list[float]): the timings, sorted from fastest to slowest
+        fraction (float): the fraction, such as 0.99 for the 99th percentile
     Returns:
-        Page: a varying page depending on the type of operator chosen
+        float: the timing at that percentile
     """
-    return Page(state, [
-        "Welcome to Colin's Calculator!",
-        Image("Math Operations.png"),
-        "Input your first number",
-        TextBox("first", state.first_digit),
-        "Input your second number",
-        TextBox("second", state.second_digit),
-        "What operator would you like to use?",
-        Button("Addition", add_page),
-        Button("Subtraction", subtraction_page),
-        Button("Multiplication", multiply_page),
-        Button("Division", division_page),
-        Button("Modulo", modulo_page),
-        Button("Exponential", exponent_page)
-        ])
+    return timings[min(len(timings) - 1, math.ceil(fraction * len(timings)) - 1)]
 
-@route
-def add_page(state: State, first: str, second: str) -> Page:
+
+def run_workload(calls: int, make_state, visit) -> dict:
     """
-    The add page will appear when the user clicks the addition button on the index page
-    and it will add together 2 numbers that the user inputs. If the user does not input a
-    number, it will bring the user to the invalid input page.
+    Times one benchmark. The state for every call is made outside the timing, and the
+    peak memory is measured on one extra call so that tracing memory does not
+    slow down the timed calls.
     
     Args:
-        state (State): the current state of the calculator
+        calls (int): how many times to visit the route
+        make_state: makes the state for each call
+        visit: visits the route with a state
     Returns:
-        Page: returns the user to the index page to compute another math problem, the
-        invalid input page if the user does not input numbers, or the get_history page
-        if the user clicks the answer history button
+        dict: the throughput, 50th and 99th percentile latency and peak memory
     """
-    if first.isdigit() and second.isdigit():
-        state.result = str(int(first) + int(second))
-        state.answer_history.append(state.result)
-    else:
-        state.valid_input = False
-        return invalid(state)
-    return Page(state, [
-        "The answer is: " + state.result,
-        Button("View Answer History", get_history),
-        Button("Restart here", index)
-        ])
+    timings = []
+    for _ in range(calls):
+        state = make_state()
+        started = time.perf_counter()
+        visit(state)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    state = make_state()
+    tracemalloc.start()
+    visit(state)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "calls": calls,
+        "throughput_per_second": calls / sum(timings),
+        "p50_seconds": percentile(timings, 0.50),
+        "p99_seconds": percentile(timings, 0.99),
+        "peak_memory_bytes": peak_bytes
+        }
 
-@route
-def subtraction_page(state: State, first: str, second: str) -> Page:
+
+def compare_benchmarks(results: dict, baseline: dict, tolerance: float) -> list[str]:
     """
-    The subtraction page will appear when the user clicks the subtraction button on the
-    index page and it will subtract the 2 numbers that the user inputs. If the user does not
-    input a number, it will bring the user to the invalid input page.
+    Finds the benchmarks that got slower or use more memory than they did in the baseline.
     
     Args:
-        state (State): the current state of the calculator
+        results (dict): the benchmark results by benchmark name
+        baseline (dict): the baseline results by benchmark name
+        tolerance (float): how much worse, as a fraction, a result may be
     Returns:
-        Page: returns the user to the index page to compute another math problem, the
-        invalid input page if the user does not input numbers, or the get_history page
-        if the user clicks the answer history button
+        list[str]: a description of each regression
     """
-    if first.isdigit() and second.isdigit():
-        state.result = str(int(first) - int(second))
-        state.answer_history.append(state.result)
-    else:
-        state.valid_input = False
-        return invalid(state)
-    return Page(state, [
-        "The answer is: " + state.result,
-        Button("View Answer History", get_history),
-        Button("Restart here", index)
-        ])
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for measure in ["p50_seconds", "p99_seconds", "peak_memory_bytes"]:
+            before, after = baseline[name][measure], result[measure]
+            if after > before * (1 + tolerance) and after - before > 1e-6:
+                regressions.append(name + ": " + measure + " went from " + format(before, ".6g")
+                                   + " to " + format(after, ".6g"))
+    return regressions
 
-@route
-def multiply_page(state: State, first: str, second: str) -> Page:
+
+def run_benchmark(arguments: list[str]) -> int:
     """
-    The multiply page will appear when the user clicks the multiplication button on the
-    index page and it will multiply the 2 numbers that the user inputs. If the user does not
-    input a number, it will bring the user to the invalid input page.
+    Runs the benchmarks for every route and operator, saves the results as JSON, and
+    compares them against a baseline from an earlier run.
     
     Args:
-        state (State): the current state of the calculator
+        arguments (list[str]): the command line arguments after "benchmark"
     Returns:
-        Page: returns the user to the index page to compute another math problem, the
-        invalid input page if the user does not input numbers, or the get_history page
-        if the user clicks the answer history button
+        int: the exit status, 1 if any benchmark regressed against the baseline
     """
-    if first.isdigit() and second.isdigit():
-        state.result = str(int(first) * int(second))
-        state.answer_history.append(state.result)
-    else:
-        state.valid_input = False
-        return invalid(state)
-    return Page(state, [
-        "The answer is: " + state.result,
-        Button("View Answer History", get_history),
-        Button("Restart here", index)
-        ])
+    parser = argparse.ArgumentParser(prog="benchmark", description="Benchmark every calculator route and operator.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="the file to save the results to")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE, help="how much worse a result may be than the baseline")
+    parser.add_argument("--only", default="", help="only run benchmarks whose names contain this text")
+    options = parser.parse_args(arguments)
+    results = {}
+    for name, calls, make_state, visit in benchmark_workloads():
+        if options.only in name:
+            results[name] = run_workload(calls, make_state, visit)
+            print(format(name, "32") + format(results[name]["throughput_per_second"], "14,.1f") + "/s"
+                  + "  p50 " + format(results[name]["p50_seconds"] * 1000, "10.4f") + " ms"
+                  + "  p99 " + format(results[name]["p99_seconds"] * 1000, "10.4f") + " ms"
+                  + "  peak " + format(results[name]["peak_memory_bytes"], "14,") + " B")
+    with io.open(options.output, "w") as output:
+        json.dump({"python": platform.python_version(), "benchmarks": results}, output, indent=2)
+    if not options.baseline:
+        return 0
+    with io.open(options.baseline) as baseline:
+        regressions = compare_benchmarks(results, json.load(baseline)["benchmarks"], options.tolerance)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if regressions else 0
 
-@route
-def division_page(state: State, first: str, second: str) -> Page:
+
+PAGE_HEAD = ('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Calculator</title></head>'
+             '<body><form method="post">')
+PAGE_TAIL = "</form></body></html>"
+
+
+@lru_cache(maxsize=4096)
+def render_button(text: str, url: str, arguments: tuple) -> str:
     """
-    The division page will appear when the user clicks the division button on the
-    index page and it will divide the 2 numbers that the user inputs. If the user does not
-    input a number, it will bring the user to the invalid input page.
+    Writes out a button as HTML. Buttons submit the page's form to their route, with their
+    arguments in the URL. The same buttons appear on page after page, so the HTML for
+    each one is remembered.
     
     Args:
-        state (State): the current state of the calculator
+        text (str): the text on the button
+        url (str): the name of the route the button goes to
+        arguments (tuple): the (name, value) pairs the button sends along
     Returns:
-        Page: returns the user to the index page to compute another math problem, the
-        invalid input page if the user does not input numbers, or the get_history page
-        if the user clicks the answer history button
+        str: the HTML for the button
     """
-    if first.isdigit() and second.isdigit():
-        state.result = str(int(first) / int(second))
-        state.answer_history.append(state.result)
-    else:
-        state.valid_input = False
-        return invalid(state)
-    return Page(state, [
-        "The answer is: " + state.result,
-        Button("View Answer History", get_history),
-        Button("Restart here", index)
-        ])
+    route_name = url.strip("/")
+    action = "/" if route_name == "index" else "/" + route_name
+    if arguments:
+        action += "?" + urllib.parse.urlencode(arguments)
+    return ('<button type="submit" formaction="' + html.escape(action) + '">'
+            + html.escape(text) + "</button>")
+
+
+def render_component(component) -> str:
+    """
+    Writes out one part of a page as HTML.
     
-@route
-def modulo_page(state: State, first: str, second: str) -> Page:
+    Args:
+        component: the text, button, text box, image or preformatted text to write out
+    Returns:
+        str: the HTML for the component
     """
-    The modulo page will appear when the user clicks the modulo button on the
-    index page and it take the first number input modulo the second number input.
-    If the user does not input a number, it will bring the user to the invalid input page.
+    if isinstance(component, Button):
+        arguments = component.extra_settings.get("arguments") or []
+        return render_button(component.text, component.url,
+                             tuple((argument.name, argument.value) for argument in arguments))
+    if isinstance(component, TextBox):
+        return ('<p><input type="' + html.escape(component.kind) + '" name="' + html.escape(component.name)
+                + '" value="' + html.escape(str(component.default_value)) + '"></p>')
+    if isinstance(component, Image):
+        size = "".join(' ' + name + '="' + str(value) + '"'
+                       for name, value in [("width", component.width), ("height", component.height)] if value)
+        return '<p><img src="/' + urllib.parse.quote(component.url) + '"' + size + ' alt=""></p>'
+    if isinstance(component, PreformattedText):
+        return "<pre>" + html.escape("".join(map(str, component.content))) + "</pre>"
+    return "<p>" + html.escape(str(component)) + "</p>"
+
+
+def render_page(page: Page) -> bytes:
+    """
+    Writes out a whole page as HTML for the serve command. The page is one form, so every
+    button sends the page's text boxes along with its own arguments.
     
     Args:
-        state (State): the current state of the calculator
+        page (Page): the page a route gave back
     Returns:
-        Page: returns the user to the index page to compute another math problem, the
-        invalid input page if the user does not input numbers, or the get_history page
-        if the user clicks the answer history button
+        bytes: the HTML document
     """
-    if first.isdigit() and second.isdigit():
-        state.result = str(int(first) % int(second))
-        state.answer_history.append(state.result)
-    else:
-        state.valid_input = False
-        return invalid(state)
-    return Page(state, [
-        "The answer is: " + state.result,
-        Button("View Answer History", get_history),
-        Button("Restart here", index)
-        ])
+    return (PAGE_HEAD + "".join(map(render_component, page.content)) + PAGE_TAIL).encode()
+
+
+def is_heavy(route_name: str, parameters: dict) -> bool:
+    """
+    Decides whether a request might take long enough that it should not be answered on
+    the event loop. Operators whose answers can get huge are heavy only when their answer
+    is predicted to be big.
     
-@route
-def exponent_page(state: State, first: str, second: str) -> Page:
+    Args:
+        route_name (str): the name of the route
+        parameters (dict): the request's parameters
+    Returns:
+        bool: whether the request is sent to the heavy request workers
     """
-    The exponent page will appear when the user clicks the exponetial button on the
-    index page and it will take the first number input to the power of the second number
-    input. If the user does not input a number, it will bring the user to the invalid input
-    page.
+    if sum(map(len, parameters.values())) > CHEAP_INPUT_CHARACTERS or route_name in HEAVY_ROUTES:
+        return True
+    symbol = ROUTE_OPERATORS.get(route_name)
+    if symbol in ANSWER_BITS:
+        first, second = parameters.get("first", ""), parameters.get("second", "0")
+        if first.isdigit() and second.isdigit():
+            return ANSWER_BITS[symbol](int(first), int(second)) > CHEAP_ANSWER_BITS
+    return False
+
+
+class CalculatorServer:
+    """
+    Serves the calculator's routes over HTTP with asyncio, so that slow requests do not
+    hold up quick ones. Cheap requests are answered right away by a small pool of threads
+    of their own, which keeps saving answers to disk off the event loop. Heavy
+    requests run in a pool of threads, at most workers of them at a time, and at most
+    queue_limit more may wait for their turn; any heavy request beyond that is answered
+    at once with 503 Service Unavailable so the client can retry later. The routes run
+    in this process because they update the sessions. The threads share the interpreter
+    lock with the event loop, so the slow parts of heavy requests (long answers and their
+    previews, number theory, modular powers, math problems with more than
+    WORKER_INPUT_DIGITS digits, and writing out full answers) are sent on to worker
+    processes.
+    """
+    
+    def __init__(self, state: State, workers: int = SERVE_HEAVY_WORKERS, queue_limit: int = SERVE_HEAVY_QUEUE):
+        self.state = state
+        self.queue_limit = queue_limit
+        self.waiting = 0
+        self.semaphore = asyncio.Semaphore(workers)
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="heavy")
+        self.cheap_executor = concurrent.futures.ThreadPoolExecutor(SERVE_CHEAP_WORKERS, thread_name_prefix="cheap")
+        self.routes = {}
+        for route_function in [index, add_page, subtraction_page, multiply_page, division_page, modulo_page,
+                               exponent_page, expression_page, more_operators, modular_power_page,
+                               prime_page, gcd_page, lcm_page, factor_page, factorial_page,
+                               combinations_page, permutations_page, get_history, history_stats,
+                               search_history, exact_division_page, invalid, undefined, full_answer,
+                               cache_stats, too_large]:
+            signature = inspect.signature(route_function)
+            self.routes[route_function.__name__] = (route_function, {
+                name: parameter.annotation for name, parameter in list(signature.parameters.items())[1:]})
+    
+    def call_route(self, route_name: str, parameters: dict) -> tuple:
+        """
+        Visits a route with the request's parameters, turned into the types the route
+        expects, and writes out the page it gives back. Parameters the route does not take
+        are left out. A route that fails is answered with 500 Internal Server Error, so the
+        client is not left waiting, and the error is printed.
+        
+        Args:
+            route_name (str): the name of the route
+            parameters (dict): the request's parameters
+        Returns:
+            tuple: the status, headers and body of the response
+        """
+        route_function, expected = self.routes[route_name]
+        try:
+            arguments = {name: (int(value) if expected[name] is int else value)
+                         for name, value in parameters.items() if name in expected}
+            page = route_function(self.state, **arguments)
+        except (TypeError, ValueError) as error:
+            return 400, {"Content-Type": "text/plain; charset=utf-8"}, (str(error) + "\n").encode()
+        except Exception:
+            traceback.print_exc()
+            return 500, {"Content-Type": "text/plain; charset=utf-8"}, b"Internal server error\n"
+        return 200, {"Content-Type": "text/html; charset=utf-8", "Cache-Control": "no-store"}, render_page(page)
+    
+    async def run_heavy(self, route_name: str, parameters: dict) -> tuple:
+        """
+        Visits a heavy route in the worker threads once one is free, or turns the request
+        away if too many heavy requests are already waiting.
+        
+        Args:
+            route_name (str): the name of the route
+            parameters (dict): the request's parameters
+        Returns:
+            tuple: the status, headers and body of the response
+        """
+        if self.semaphore.locked() and self.waiting >= self.queue_limit:
+            calculator_metrics.record_busy()
+            return 503, {"Content-Type": "text/plain; charset=utf-8", "Retry-After": "1"}, b"Server busy, please retry.\n"
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.call_route,
+                                                                    route_name, parameters)
+        finally:
+            self.semaphore.release()
+    
+    async def respond(self, method: str, target: str, headers: dict, body: bytes) -> tuple:
+        """
+        Works out the response to one request: the raw metrics, an image, or a route.
+        
+        Args:
+            method (str): the request method, such as GET or POST
+            target (str): the path and query string that were requested
+            headers (dict): the request headers, with lowercase names
+            body (bytes): the request body
+        Returns:
+            tuple: the status, headers and body of the response
+        """
+        if method not in ("GET", "HEAD", "POST"):
+            return 405, {"Allow": "GET, HEAD, POST"}, b""
+        path, _, query = target.partition("?")
+        path = urllib.parse.unquote(path)
+        if path == "/metrics":
+            return 200, {"Content-Type": "text/plain; version=0.0.4"}, calculator_metrics.render().encode()
+        asset = site_assets.response(path.lstrip("/"), headers.get("if-none-match", ""))
+        if asset is not None:
+            return asset
+        route_name = path.strip("/") or "index"
+        if route_name not in self.routes:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not found\n"
+        parameters = dict(urllib.parse.parse_qsl(query, keep_blank_values=True))
+        if method == "POST":
+            parameters.update(urllib.parse.parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True))
+        if is_heavy(route_name, parameters):
+            return await self.run_heavy(route_name, parameters)
+        return await asyncio.get_running_loop().run_in_executor(self.cheap_executor, self.call_route,
+                                                                route_name, parameters)
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the requests that come in on one connection, keeping it open between
+        requests unless the client asks to close it.
+        
+        Args:
+            reader (asyncio.StreamReader): reads from the connection
+            writer (asyncio.StreamWriter): writes to the connection
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                request_line = lines[0].split(" ")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0")
+                if len(request_line) != 3 or not length.isdigit() or int(length) > MAX_REQUEST_BYTES:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                method, target, version = request_line
+                body = await reader.readexactly(int(length))
+                status, response_headers, content = await self.respond(method, target, headers, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                lines = ["HTTP/1.1 " + str(status) + " " + HTTP_REASONS.get(status, "")]
+                lines += [name + ": " + value for name, value in response_headers.items()]
+                lines += ["Content-Length: " + str(len(content)), "Connection: " + ("keep-alive" if keep_alive else "close")]
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host: str, port: int):
+        """
+        Listens for connections until the server is stopped.
+        
+        Args:
+            host (str): the address to listen on
+            port (int): the port to listen on
+        """
+        listener = await asyncio.start_server(self.handle_connection, host, port)
+        print("Serving the calculator on http://" + host + ":" + str(port), flush=True)
+        async with listener:
+            await listener.serve_forever()
+
+
+HTTP_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def run_serve(arguments: list[str]) -> int:
+    """
+    Serves the calculator over HTTP with the asyncio server instead of drafter, so cheap
+    requests stay quick while heavy ones are worked on.
     
     Args:
-        state (State): the current state of the calculator
+        arguments (list[str]): the command line arguments after "serve"
     Returns:
-        Page: returns the user to the index page to compute another math problem, the
-        invalid input page if the user does not input numbers, or the get_history page
-        if the user clicks the answer history button
+        int: the exit status, 0 when the server was stopped
     """
-    if first.isdigit() and second.isdigit():
-        state.result = str(int(first) ** int(second))
-        state.answer_history.append(state.result)
-    else:
-        state.valid_input = False
-        return invalid(state)
-    return Page(state, [
-        "The answer is: " + state.result,
-        Button("View Answer History", get_history),
-        Button("Restart here", index)
-        ])
+    parser = argparse.ArgumentParser(prog="serve", description="Serve the calculator over HTTP with asyncio.")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="the port to listen on")
+    parser.add_argument("--workers", type=int, default=SERVE_HEAVY_WORKERS,
+                        help="how many heavy requests are worked on at once")
+    parser.add_argument("--queue", type=int, default=SERVE_HEAVY_QUEUE,
+                        help="how many more heavy requests may wait before the server says it is busy")
+    parser.add_argument("--history", default=HISTORY_DIRECTORY,
+                        help='the folder, next to this file, to save answer histories in, or "" to keep them in memory')
+    options = parser.parse_args(arguments)
+    sessions.directory = options.history
+    server = CalculatorServer(State("", "", AnswerHistory(), True, "", shared=True), options.workers, options.queue)
+    try:
+        asyncio.run(server.serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(wait=False, cancel_futures=True)
+        server.cheap_executor.shutdown(wait=False, cancel_futures=True)
+        cancel_power_jobs()
+    return 0
 
-@route
-def get_history(state: State) -> Page:
+
+
+class LoadClient:
+    """
+    One simulated user for the load test. The user opens the index page and its image,
+    then works through a few math problems with random operators, sometimes typing
+    invalid input and sometimes looking at their answer history, before starting over
+    from the index page. The user keeps one connection open, keeps their session, and
+    asks for the image again with its ETag like a browser would.
     """
-    The get_history page will appear when the user clicks the answer history button
-    after completing a math problem and shows the user all of their past answers that
-    they had computed.
+    
+    def __init__(self, host: str, port: int, seed: int):
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+        self.connection = http.client.HTTPConnection(host, port, timeout=LOADTEST_TIMEOUT_SECONDS)
+        self.session = ""
+        self.etag = ""
+    
+    def visit(self, results: list, method: str, path: str, body: str = "", headers: dict | None = None) -> str:
+        """
+        Sends one request and records its status and how long it took. A failed
+        connection is recorded with the status 0 and opened again.
+        
+        Args:
+            results (list): the (status, seconds) pairs to add this request to
+            method (str): the request method
+            path (str): the path and query string to request
+            body (str): the form data to send
+            headers (dict | None): extra request headers
+        Returns:
+            str: the response body, or "" if the request failed
+        """
+        headers = dict(headers or {})
+        if body:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body.encode() or None, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            results.append((response.status, time.perf_counter() - started))
+            if response.getheader("ETag"):
+                self.etag = response.getheader("ETag")
+            return content.decode("utf-8", "replace")
+        except (OSError, http.client.HTTPException):
+            results.append((0, time.perf_counter() - started))
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=LOADTEST_TIMEOUT_SECONDS)
+            return ""
+    
+    def run(self, stop: threading.Event, results: list):
+        """
+        Follows the user's script over and over until the step is over.
+        
+        Args:
+            stop (threading.Event): set when the step is over
+            results (list): the (status, seconds) pairs to add every request to
+        """
+        while not stop.is_set():
+            query = "?session=" + self.session if self.session else ""
+            page = self.visit(results, "GET", "/" + query)
+            found = re.search(r'session=([^"&\s<>]+)', page)
+            if found:
+                self.session = urllib.parse.unquote(html.unescape(found.group(1)))
+            image = re.search(r'<img src="([^"]+)"', page)
+            if image:
+                self.visit(results, "GET", image.group(1), headers={"If-None-Match": self.etag} if self.etag else {})
+            for _ in range(self.random.randint(1, 5)):
+                if stop.is_set():
+                    return
+                route_name = self.random.choice(["add_page", "subtraction_page", "multiply_page",
+                                                 "division_page", "modulo_page", "exponent_page"])
+                first = str(self.random.randint(0, 10 ** self.random.randint(1, 12)))
+                second = str(self.random.randint(1, 99))
+                if self.random.random() < LOADTEST_INVALID_RATE:
+                    first = "number"
+                self.visit(results, "POST", "/" + route_name + "?session=" + self.session,
+                           urllib.parse.urlencode({"first": first, "second": second}))
+                if self.random.random() < LOADTEST_HISTORY_RATE:
+                    self.visit(results, "GET", "/get_history?session=" + self.session)
+        self.connection.close()
+
+
+def process_rss(pid: int) -> int | None:
+    """
+    Reads how much memory a process is using from /proc, which only Linux has.
     
     Args:
-        state (State): the current state of the calculator
+        pid (int): the id of the process
     Returns:
-        Page: returns the user to the index page to compute another math problem
+        int | None: the resident set size in bytes, or None if it cannot be read
     """
-    history = ""
-    for answer in state.answer_history:
-        history += answer + ", "
-    return Page(state, [
-        "Your answer history is: " + history,
-        Button("Restart here", index)
-        ])
+    try:
+        with io.open("/proc/" + str(pid) + "/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
 
-@route
-def invalid(state: State) -> Page:
+
+def summarize_step(users: int, results: list, seconds: float, rss_samples: list) -> dict:
     """
-    The invalid page will appear with an error message when the user inputs anything
-    other than numbers into the first or second number of the state and remind the
-    user that they can only input numbers.
+    Works out the throughput, latency percentiles, error rate and memory use of one step
+    of the load test. Responses with a 5xx status or no response at all are errors, and
+    the server's busy responses are counted on their own as well.
     
     Args:
-        state (State): the current state of the calculator
+        users (int): how many simulated users the step ran
+        results (list): the (status, seconds) pair of every request
+        seconds (float): how long the step ran
+        rss_samples (list): the server's resident set size in bytes, sampled during the step
     Returns:
-        Page: returns the user to the index page to compute another math problem
+        dict: the step's results
     """
-    return Page(state, [
-        "Invalid Input! You may only input numbers. Try Again.",
-        Image("error.png"),
-        Button("Retry", index)
-        ])
+    timings = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status == 0 or status >= 500)
+    summary = {
+        "users": users,
+        "requests": len(results),
+        "throughput_per_second": len(results) / seconds,
+        "error_rate": errors / len(results) if results else 0.0,
+        "busy_rate": sum(1 for status, _ in results if status == 503) / len(results) if results else 0.0,
+        "rss_bytes": rss_samples
+        }
+    for name, fraction in [("p50_seconds", 0.5), ("p90_seconds", 0.9), ("p99_seconds", 0.99), ("max_seconds", 1.0)]:
+        summary[name] = percentile(timings, fraction) if timings else 0.0
+    return summary
+
+
+def run_load_step(host: str, port: int, users: int, seconds: float, pid: int | None) -> dict:
+    """
+    Runs one step of the load test: users simulated users at once for the given time,
+    while the server's memory is sampled.
+    
+    Args:
+        host (str): the server's address
+        port (int): the server's port
+        users (int): how many simulated users to run
+        seconds (float): how long to run them
+        pid (int | None): the server's process id, or None if its memory cannot be sampled
+    Returns:
+        dict: the step's results
+    """
+    stop = threading.Event()
+    results = []
+    clients = [LoadClient(host, port, users * 100000 + number) for number in range(users)]
+    threads = [threading.Thread(target=client.run, args=(stop, results), daemon=True) for client in clients]
+    rss_samples = []
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while time.perf_counter() - started < seconds:
+        rss = process_rss(pid) if pid is not None else None
+        if rss is not None:
+            rss_samples.append(rss)
+        time.sleep(LOADTEST_RSS_INTERVAL_SECONDS)
+    stop.set()
+    for thread in threads:
+        thread.join(LOADTEST_TIMEOUT_SECONDS)
+    return summarize_step(users, results, time.perf_counter() - started, rss_samples)
+
+
+def run_loadtest(arguments: list[str]) -> int:
+    """
+    Load tests the calculator with simulated users, stepping up the number of users at
+    once to find where the server falls over. Unless a running server is given, a fresh
+    serve command is started with its own temporary history folder and stopped at the
+    end, so nothing outside this machine is needed.
+    
+    Args:
+        arguments (list[str]): the command line arguments after "loadtest"
+    Returns:
+        int: the exit status, 1 if any step failed
+    """
+    parser = argparse.ArgumentParser(prog="loadtest", description="Drive a local calculator server with simulated users.")
+    parser.add_argument("--users", default=LOADTEST_USERS, help="comma separated numbers of users to run, one step each")
+    parser.add_argument("--seconds", type=float, default=LOADTEST_STEP_SECONDS, help="how long each step runs")
+    parser.add_argument("--host", default="127.0.0.1", help="the address of the server")
+    parser.add_argument("--port", type=int, default=8765, help="the port of the server")
+    parser.add_argument("--existing", action="store_true", help="test a server that is already running instead of starting one")
+    parser.add_argument("-o", "--output", help="a file to save the results to as JSON")
+    options = parser.parse_args(arguments)
+    server, history_folder, pid = None, None, None
+    if not options.existing:
+        history_folder = tempfile.mkdtemp(prefix="calculator-history-")
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--host", options.host,
+                                   "--port", str(options.port), "--history", history_folder],
+                                  stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()
+        pid = server.pid
+    steps = []
+    try:
+        for users in [int(number) for number in options.users.split(",")]:
+            step = run_load_step(options.host, options.port, users, options.seconds, pid)
+            steps.append(step)
+            rss = step["rss_bytes"]
+            print(format(users, "6") + " users" + format(step["throughput_per_second"], "12,.1f") + "/s"
+                  + "  p50 " + format(step["p50_seconds"] * 1000, "9.2f") + " ms"
+                  + "  p99 " + format(step["p99_seconds"] * 1000, "9.2f") + " ms"
+                  + "  errors " + format(step["error_rate"], "7.2%")
+                  + "  busy " + format(step["busy_rate"], "7.2%")
+                  + ("  rss " + format(rss[0] >> 20, ",") + " -> " + format(rss[-1] >> 20, ",") + " MiB" if rss else ""),
+                  flush=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            shutil.rmtree(history_folder, ignore_errors=True)
+    failed = [step["users"] for step in steps
+              if step["error_rate"] > LOADTEST_ERROR_LIMIT or step["p99_seconds"] > LOADTEST_P99_LIMIT_SECONDS]
+    if failed:
+        print("Falls over at " + str(failed[0]) + " users")
+    if options.output:
+        with io.open(options.output, "w") as output:
+            json.dump({"python": platform.python_version(), "steps": steps}, output, indent=2)
+    return 1 if failed else 0
+
+
+COMMANDS = {
+    "batch": run_batch,
+    "benchmark": run_benchmark,
+    "serve": run_serve,
+    "loadtest": run_loadtest
+    }
 
-start_server(State("", "", [], True, ""))
+if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
+start_server(State("", "", AnswerHistory(), True, "", shared=True))
 
 assert_equal(
- get_history(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2'], valid_input=True, result='0.2')),
+ get_history(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2]), valid_input=True, result='0.2')),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2]),
                  valid_input=True,
                  result='0.2'),
-     content=['Your answer history is: 9, 1, 72, 0.2, ', Button(text='Restart here', url='/')]))
+     content=['Your answer history is: 9, 1, 72, 0.2, ',
+              Button(text='History Statistics', url='/history_stats'),
+              Button(text='Restart here', url='/')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9', '1'], valid_input=True, result='1')),
- Page(state=State(first_digit='', second_digit='', answer_history=['9', '1'], valid_input=True, result='1'),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1]), valid_input=True, result='1')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1]), valid_input=True, result='1'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -261,13 +4480,18 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=[], valid_input=True, result='')),
- Page(state=State(first_digit='', second_digit='', answer_history=[], valid_input=True, result=''),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result='')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -278,17 +4502,22 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2'], valid_input=True, result='0.2')),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2]), valid_input=True, result='0.2')),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2]),
                  valid_input=True,
                  result='0.2'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -299,26 +4528,33 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- get_history(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2', '0', '1156'], valid_input=True, result='1156')),
+ get_history(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]), valid_input=True, result='1156')),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0', '1156'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]),
                  valid_input=True,
                  result='1156'),
-     content=['Your answer history is: 9, 1, 72, 0.2, 0, 1156, ', Button(text='Restart here', url='/')]))
+     content=['Your answer history is: 9, 1, 72, 0.2, 0, 1156, ',
+              Button(text='History Statistics', url='/history_stats'),
+              Button(text='Restart here', url='/')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2', '0', '1156'], valid_input=True, result='1156')),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]), valid_input=True, result='1156')),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0', '1156'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]),
                  valid_input=True,
                  result='1156'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -329,20 +4565,24 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- add_page(State(first_digit='', second_digit='', answer_history=[], valid_input=True, result=''), '4', '5'),
- Page(state=State(first_digit='', second_digit='', answer_history=['9'], valid_input=True, result='9'),
+ add_page(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''), '4', '5'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'),
      content=['The answer is: 9',
               Button(text='View Answer History', url='/get_history'),
               Button(text='Restart here', url='/')]))
 
 assert_equal(
- division_page(State(first_digit='', second_digit='', answer_history=['9', '1', '72'], valid_input=True, result='72'), '3', '15'),
+ division_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72]), valid_input=True, result='72'), '3', '15'),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2]),
                  valid_input=True,
                  result='0.2'),
      content=['The answer is: 0.2',
@@ -350,14 +4590,15 @@ assert_equal(
               Button(text='Restart here', url='/')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2', '0', '1156'], valid_input=False, result='1156')),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]), valid_input=False, result='1156')),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0', '1156'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]),
                  valid_input=False,
                  result='1156'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -368,13 +4609,17 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- exponent_page(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2', '0'], valid_input=True, result='0'), '34', '2'),
+ exponent_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2, 0]), valid_input=True, result='0'), '34', '2'),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0', '1156'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]),
                  valid_input=True,
                  result='1156'),
      content=['The answer is: 1156',
@@ -382,26 +4627,29 @@ assert_equal(
               Button(text='Restart here', url='/')]))
 
 assert_equal(
- add_page(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2', '0', '1156'], valid_input=True, result='1156'), 'number', '2'),
+ add_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]), valid_input=True, result='1156'), 'number', '2'),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0', '1156'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0, 1156]),
                  valid_input=False,
                  result='1156'),
      content=['Invalid Input! You may only input numbers. Try Again.',
-              Image(url='error.png', width=None, height=None),
+              Image(url=site_assets.assets['error.png'].url, width=site_assets.assets['error.png'].width,
+                    height=site_assets.assets['error.png'].height),
               Button(text='Retry', url='/')]))
 
 assert_equal(
- get_history(State(first_digit='', second_digit='', answer_history=['9'], valid_input=True, result='9')),
- Page(state=State(first_digit='', second_digit='', answer_history=['9'], valid_input=True, result='9'),
-     content=['Your answer history is: 9, ', Button(text='Restart here', url='/')]))
+ get_history(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'),
+     content=['Your answer history is: 9, ',
+              Button(text='History Statistics', url='/history_stats'),
+              Button(text='Restart here', url='/')]))
 
 assert_equal(
- modulo_page(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2'], valid_input=True, result='0.2'), '9', '9'),
+ modulo_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2]), valid_input=True, result='0.2'), '9', '9'),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0]),
                  valid_input=True,
                  result='0'),
      content=['The answer is: 0',
@@ -409,14 +4657,15 @@ assert_equal(
               Button(text='Restart here', url='/')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9', '1', '72', '0.2', '0'], valid_input=True, result='0')),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72, 0.2, 0]), valid_input=True, result='0')),
  Page(state=State(first_digit='',
                  second_digit='',
-                 answer_history=['9', '1', '72', '0.2', '0'],
+                 answer_history=AnswerHistory([9, 1, 72, 0.2, 0]),
                  valid_input=True,
                  result='0'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -427,20 +4676,25 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- multiply_page(State(first_digit='', second_digit='', answer_history=['9', '1'], valid_input=True, result='1'), '8', '9'),
- Page(state=State(first_digit='', second_digit='', answer_history=['9', '1', '72'], valid_input=True, result='72'),
+ multiply_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1]), valid_input=True, result='1'), '8', '9'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72]), valid_input=True, result='72'),
      content=['The answer is: 72',
               Button(text='View Answer History', url='/get_history'),
               Button(text='Restart here', url='/')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9'], valid_input=True, result='9')),
- Page(state=State(first_digit='', second_digit='', answer_history=['9'], valid_input=True, result='9'),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -451,18 +4705,25 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- get_history(State(first_digit='', second_digit='', answer_history=['9', '1', '72'], valid_input=True, result='72')),
- Page(state=State(first_digit='', second_digit='', answer_history=['9', '1', '72'], valid_input=True, result='72'),
-     content=['Your answer history is: 9, 1, 72, ', Button(text='Restart here', url='/')]))
+ get_history(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72]), valid_input=True, result='72')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72]), valid_input=True, result='72'),
+     content=['Your answer history is: 9, 1, 72, ',
+              Button(text='History Statistics', url='/history_stats'),
+              Button(text='Restart here', url='/')]))
 
 assert_equal(
- index(State(first_digit='', second_digit='', answer_history=['9', '1', '72'], valid_input=True, result='72')),
- Page(state=State(first_digit='', second_digit='', answer_history=['9', '1', '72'], valid_input=True, result='72'),
+ index(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72]), valid_input=True, result='72')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, 72]), valid_input=True, result='72'),
      content=["Welcome to Colin's Calculator!",
-              Image(url='Math Operations.png', width=None, height=None),
+              Image(url=site_assets.assets['Math Operations.png'].url, width=site_assets.assets['Math Operations.png'].width,
+                    height=site_assets.assets['Math Operations.png'].height),
               'Input your first number',
               TextBox(name='first', kind='text', default_value=''),
               'Input your second number',
@@ -473,11 +4734,454 @@ assert_equal(
               Button(text='Multiplication', url='/multiply_page'),
               Button(text='Division', url='/division_page'),
               Button(text='Modulo', url='/modulo_page'),
-              Button(text='Exponential', url='/exponent_page')]))
+              Button(text='Exponential', url='/exponent_page'),
+              'Or type a whole math problem, such as (34**2 % 97) / 3 + 5',
+              TextBox(name='expression', kind='text', default_value=''),
+              Button(text='Evaluate', url='/expression_page'),
+              Button(text='More Operators', url='/more_operators')]))
 
 assert_equal(
- subtraction_page(State(first_digit='', second_digit='', answer_history=['9'], valid_input=True, result='9'), '5', '4'),
- Page(state=State(first_digit='', second_digit='', answer_history=['9', '1'], valid_input=True, result='1'),
+ subtraction_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'), '5', '4'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1]), valid_input=True, result='1'),
      content=['The answer is: 1',
               Button(text='View Answer History', url='/get_history'),
-              Button(text='Restart here', url='/')]))
\ No newline at end of file
+              Button(text='Restart here', url='/')]))
+
+assert_equal(
+ exponent_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'), '9', '99999999'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'),
+     content=['Result too large! That answer has too many digits to compute. Try smaller numbers.',
+              Image(url=site_assets.assets['error.png'].url, width=site_assets.assets['error.png'].width,
+                    height=site_assets.assets['error.png'].height),
+              Button(text='Retry', url='/')]))
+
+assert_equal(estimate_power_bits(34, 2), 12)
+assert_equal(estimate_power_bits(1, 99999999), 1)
+assert_equal(estimate_power_bits(9, 99999999) > MAX_POWER_BITS, True)
+assert_equal(compute_power(2, 600000), 2 ** 600000)
+
+long_answer = '9' * 20 + '...' + '0' * 19 + '1 (1,200 digits)'
+assert_equal(
+ multiply_page(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''), '9' * 600, '9' * 600),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([long_answer]), valid_input=True, result=long_answer),
+     content=['The answer is: ' + long_answer,
+              Button(text='View Full Answer', url='/full_answer', arguments=[Argument('answer', long_answer), Argument('part', 0)]),
+              Button(text='View Answer History', url='/get_history'),
+              Button(text='Restart here', url='/')]))
+
+assert_equal(
+ full_answer(State(first_digit='', second_digit='', answer_history=AnswerHistory([long_answer]), valid_input=True, result=long_answer), long_answer, 0),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([long_answer]), valid_input=True, result=long_answer),
+     content=['Part 1 of 1 of the answer ' + long_answer + ':',
+              '9' * 599 + '8' + '0' * 599 + '1',
+              Button(text='Restart here', url='/')]))
+
+assert_equal(parse_digits(int_to_decimal(7 ** 20000)), 7 ** 20000)
+assert_equal(preview_answer(10 ** 5000), '10000000000000000000...00000000000000000000 (5,001 digits)')
+assert_equal(format_answer(-(10 ** 1000)), '-10000000000000000000...00000000000000000000 (1,001 digits)')
+
+test_cache = ResultCache(1000)
+test_cache.put(('+', '4', '5'), '9', 9)
+assert_equal(test_cache.get(('+', '4', '5')), ('9', 9))
+assert_equal(test_cache.get(('-', '4', '5')), None)
+assert_equal((test_cache.hits, test_cache.misses), (1, 1))
+test_cache.put(('*', '9' * 600, '9' * 600), '1,200 digits', 10 ** 1200)
+assert_equal(len(test_cache.entries), 1)
+assert_equal(calculate("*", '8', '9'), 72)
+assert_equal(calculate("*", '8', '9'), 72)
+assert_equal(calculate("**", '9', '99999999'), None)
+assert_equal(calculate("*", '9' * 600, '9' * 600), long_answer)
+assert_equal(calculate("*", '9' * 600, '9' * 600), long_answer)
+
+test_history = AnswerHistory(range(7), capacity=5)
+assert_equal(test_history.results(), [2, 3, 4, 5, 6])
+assert_equal([record.result for record in test_history.page(1, page_size=2)], [4, 5])
+assert_equal(test_history.page_count(page_size=2), 3)
+
+assert_equal(
+ get_history(State(first_digit='', second_digit='', answer_history=AnswerHistory(range(120)), valid_input=True, result='119'), 1),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory(range(120)), valid_input=True, result='119'),
+     content=['Your answer history is: ' + ''.join(str(number) + ', ' for number in range(50, 100)),
+              'Page 2 of 3',
+              Button(text='Previous Page', url='/get_history', arguments=[Argument('page', 0)]),
+              Button(text='Next Page', url='/get_history', arguments=[Argument('page', 2)]),
+              Button(text='History Statistics', url='/history_stats'),
+              Button(text='Restart here', url='/')]))
+
+shared_state = State('', '', AnswerHistory(), True, '', shared=True)
+first_visitor = index(shared_state).state
+second_visitor = index(first_visitor).state
+assert_equal(first_visitor.session != '' and first_visitor.session != second_visitor.session, True)
+add_page(shared_state, '4', '5', first_visitor.session)
+assert_equal(first_visitor.answer_history, AnswerHistory([9]))
+assert_equal(second_visitor.answer_history, AnswerHistory())
+assert_equal(index(shared_state, first_visitor.session).content[12],
+             Button(text='Exponential', url='/exponent_page', arguments=[Argument('session', first_visitor.session)]))
+for extension in ['.log', '.idx']:
+    if os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_DIRECTORY, first_visitor.session.partition('.')[0] + extension)):
+        os.remove(os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_DIRECTORY, first_visitor.session.partition('.')[0] + extension))
+
+test_sessions = SessionStore(2, 1 << 20, 60)
+test_sessions.get('a')
+test_sessions.get('b')
+test_sessions.get('a').answer_history.append(1)
+test_sessions.get('c')
+assert_equal(list(test_sessions.sessions), ['a', 'c'])
+assert_equal(test_sessions.get('a').answer_history, AnswerHistory([1]))
+
+assert_equal(evaluate_rows([('4', '+', '5'), ('3', 'division_page', '15'), ('number', '+', '2'),
+                            ('9', '%', '0'), ('9', '**', '99999999'), ('2', '^', '3')]),
+             ['9', '0.2', 'invalid', 'undefined', 'too large', 'unknown operator'])
+assert_equal(evaluate_row('9' * 600, '*', '9' * 600), '9' * 599 + '8' + '0' * 599 + '1')
+assert_equal(evaluate_rows([('1' + '0' * 400, '/', '3'), ('8', '/', '2')]), ['too large', '4.0'])
+assert_equal(list(read_batch_rows(['first,operator,second', '34, **, 2', ''], 'csv')), [('34', '**', '2')])
+assert_equal(list(read_batch_rows(['{"first": 8, "operator": "*", "second": "9"}'], 'jsonl')), [('8', '*', '9')])
+assert_equal(list(read_batch_rows(['34, **', '8,*,9'], 'csv')), [('34', '**', ''), ('8', '*', '9')])
+assert_equal(list(read_batch_rows(['{"first": 8, "second": 9}', 'not json', '[1, 2]'], 'jsonl')),
+             [('8', '', '9'), ('not json', '', ''), ('[1, 2]', '', '')])
+assert_equal(evaluate_rows([('34', '**', ''), ('8', '', '9'), ('not json', '', '')]), ['invalid', 'invalid', 'invalid'])
+assert_equal(list(chunked(iter(range(5)), 2)), [[0, 1], [2, 3], [4]])
+
+bulk_firsts = ['4', '3', '9', '34', '4000000000', '9' * 30, '3037000500', '9007199254740993']
+bulk_seconds = ['5', '15', '0', '2', '4000000000', '1', '3037000500', '3']
+for symbol in OPERATORS:
+    expected = []
+    for first, second in zip(bulk_firsts, bulk_seconds):
+        try:
+            expected.append(OPERATORS[symbol](int(first), int(second)))
+        except ZeroDivisionError:
+            expected.append('undefined')
+    if symbol in ANSWER_BITS:
+        expected = [exact_answer(symbol, first, second) for first, second in zip(bulk_firsts, bulk_seconds)]
+    assert_equal(bulk_calculate(symbol, bulk_firsts, bulk_seconds), expected)
+
+test_metrics = Metrics((0.001, 0.01))
+test_metrics.record_request('add_page', 0.005)
+test_metrics.record_request('add_page', 0.5)
+test_metrics.record_invalid('add_page')
+test_metrics.record_busy()
+assert_equal(test_metrics.render().split('\n')[:11],
+             ['# TYPE calculator_requests_total counter',
+              'calculator_requests_total{route="add_page"} 2',
+              '# TYPE calculator_invalid_inputs_total counter',
+              'calculator_invalid_inputs_total{route="add_page"} 1',
+              '# TYPE calculator_busy_rejections_total counter',
+              'calculator_busy_rejections_total 1',
+              '# TYPE calculator_request_seconds histogram',
+              'calculator_request_seconds_bucket{route="add_page",le="0.001"} 0',
+              'calculator_request_seconds_bucket{route="add_page",le="0.01"} 1',
+              'calculator_request_seconds_bucket{route="add_page",le="+Inf"} 2',
+              'calculator_request_seconds_sum{route="add_page"} 0.505'])
+test_metrics.enabled = False
+test_metrics.record_request('add_page', 0.005)
+assert_equal(test_metrics.requests, {'add_page': 2})
+assert_equal(calculator_metrics.invalid_inputs.get('add_page', 0) > 0, True)
+
+assert_equal(percentile([1, 2, 3, 4], 0.5), 2)
+assert_equal(percentile([1, 2, 3, 4], 0.99), 4)
+assert_equal(compare_benchmarks({'index': {'p50_seconds': 0.002, 'p99_seconds': 0.002, 'peak_memory_bytes': 100}},
+                                {'index': {'p50_seconds': 0.001, 'p99_seconds': 0.002, 'peak_memory_bytes': 100}}, 0.25),
+             ['index: p50_seconds went from 0.001 to 0.002'])
+assert_equal(run_workload(3, benchmark_state, index)['calls'], 3)
+
+error_image = site_assets.assets['error.png']
+if PillowImage is not None:
+    assert_equal([error_image.width, error_image.height], [208, 219])
+    assert_equal(error_image.url.startswith('assets/error.') and error_image.url.endswith('.webp'), True)
+    assert_equal(len(error_image.content) < 50893, True)
+    assert_equal(site_assets.response('error.png'), None)
+    with io.open(os.path.join(site_assets.folder, error_image.url), 'wb') as broken_copy:
+        broken_copy.write(error_image.content[:100])
+    assert_equal(AssetStore(ASSET_DIRECTORY).add('error.png').content == error_image.content, True)
+    assert_equal([name for name in os.listdir(os.path.join(site_assets.folder, ASSET_DIRECTORY)) if name.endswith('.tmp')], [])
+else:
+    assert_equal([error_image.url, error_image.width, error_image.height], ['error.png', None, None])
+assert_equal(site_assets.response(error_image.url)[0], 200)
+assert_equal(site_assets.response(error_image.url)[1]['Cache-Control'], 'public, max-age=31536000, immutable')
+assert_equal(site_assets.response(error_image.url, error_image.etag)[0], 304)
+assert_equal(len(site_assets.response(error_image.url, error_image.etag)[2]), 0)
+assert_equal(site_assets.response('missing.png'), None)
+
+repeat_state = State('', '', AnswerHistory(), True, '')
+assert_equal(index(repeat_state).content[-1] is index(repeat_state).content[-1], True)
+assert_equal(index(repeat_state).content[1] is index(repeat_state).content[1], True)
+assert_equal(invalid(repeat_state).content[-1] is too_large(repeat_state).content[-1], True)
+assert_equal(add_page(repeat_state, '4', '5').content[-1] is get_history(repeat_state).content[-1], True)
+
+assert_equal(compile_expression('(34**2 % 97) / 3 + 5'), (34, 2, '**', 97, '%', 3, '/', 5, '+'))
+assert_equal(compile_expression('-2 ** 2 ** 3'), (2, 2, 3, '**', '**', 'neg'))
+assert_equal(run_expression(compile_expression('-2 ** 2')), -4)
+assert_equal(run_expression(compile_expression('2 ** -1 * (3 - -1)')), 2.0)
+assert_equal(run_expression(compile_expression('(9 ** 99999999) - 1')), None)
+assert_equal(run_expression(compile_expression('(-8) ** 3')), -512)
+assert_equal(run_expression(compile_expression('(3 / 2) ** 2')), 2.25)
+assert_equal(run_expression(compile_expression('4 ** (1 / 2)')), 2.0)
+assert_equal(run_expression(compile_expression('(3 / 2) ** 99999')), None)
+assert_equal(run_expression(compile_expression('10 ** 308 / 1 * 10')), None)
+assert_equal(run_expression(compile_expression('10 ** 308 / 1 * 10 - 10 ** 308 / 1 * 10')), None)
+assert_equal(run_expression(compile_expression('10 ** 400 / 1')), None)
+assert_equal(step_bits('%', 9 ** 20000, 3 ** 20000), (9 ** 20000).bit_length())
+assert_equal(step_bits('*', 2 ** 100, 2 ** 50), 152)
+assert_equal(step_bits('**', 3, 1000), 2000)
+assert_equal(compile_expression('1 + 1') is compile_expression('1 + 1'), True)
+
+assert_equal(
+ expression_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'), '(34**2 % 97) / 3 + 5'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 34.66666666666667]), valid_input=True, result='34.66666666666667'),
+     content=['The answer is: 34.66666666666667',
+              Button(text='View Answer History', url='/get_history'),
+              Button(text='Restart here', url='/')]))
+
+assert_equal(
+ expression_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'), '(3 +'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=False, result='9'),
+     content=['Invalid Input! You may only input numbers. Try Again.',
+              Image(url=site_assets.assets['error.png'].url, width=site_assets.assets['error.png'].width,
+                    height=site_assets.assets['error.png'].height),
+              Button(text='Retry', url='/')]))
+
+far_future = time.monotonic() + 60
+assert_equal([prime_test(number, far_future) for number in [0, 1, 2, 97, 561, 2 ** 61 - 1]],
+             ['not prime', 'not prime', 'prime', 'prime', 'not prime', 'prime'])
+assert_equal(prime_test(2 ** 127 - 1, far_future), 'probably prime (passed 40 rounds)')
+assert_equal(prime_test(2 ** 127 - 1, time.monotonic() - 1), 'unknown, timed out')
+assert_equal(factorize(2 ** 127 - 1, time.monotonic() - 1), ([], [2 ** 127 - 1]))
+assert_equal(factorize(1156, far_future), ([2, 2, 17, 17], []))
+assert_equal(factorize((2 ** 31 - 1) * (2 ** 61 - 1), far_future), ([2 ** 31 - 1, 2 ** 61 - 1], []))
+assert_equal(factorize((2 ** 89 - 1) * (2 ** 107 - 1), time.monotonic()), ([], [(2 ** 89 - 1) * (2 ** 107 - 1)]))
+assert_equal(describe_factors([2, 2, 17, 17], []), '2^2 × 17^2')
+assert_equal(describe_factors([3], [35]), '3 × (35, not factored in time)')
+
+assert_equal(
+ modular_power_page(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''), '4', '13', '497'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([445]), valid_input=True, result='445'),
+     content=['The answer is: 445',
+              Button(text='View Answer History', url='/get_history'),
+              Button(text='Restart here', url='/')]))
+
+assert_equal(
+ factor_page(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''), '72'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory(['2^3 × 3^2']), valid_input=True, result='2^3 × 3^2'),
+     content=['The answer is: 2^3 × 3^2',
+              Button(text='View Answer History', url='/get_history'),
+              Button(text='Restart here', url='/')]))
+
+assert_equal(gcd_page(State('', '', AnswerHistory(), True, ''), '34', '51').state.result, '17')
+assert_equal(lcm_page(State('', '', AnswerHistory(), True, ''), '4', '6').state.result, '12')
+assert_equal(prime_page(State('', '', AnswerHistory(), True, ''), '97').state.result, '97 is prime')
+assert_equal(factor_page(State('', '', AnswerHistory(), True, ''), '0').state.valid_input, False)
+assert_equal(prime_page(State('', '', AnswerHistory(), True, ''), str(2 ** 127 - 1)).state.result,
+             format_answer(2 ** 127 - 1) + ' is probably prime (passed 40 rounds)')
+assert_equal(factor_within_budget(2 ** 64 + 1, time.monotonic() + 2), ([274177, 67280421310721], []))
+assert_equal(divide_small_primes(7 * 7 * 11 * 1009), ([7, 7, 11], 1009))
+NUMBER_THEORY_SECONDS = 0
+assert_equal(prime_page(State('', '', AnswerHistory(), True, ''), str(2 ** 127 - 1)).state.result,
+             format_answer(2 ** 127 - 1) + ' is unknown, timed out')
+assert_equal(factor_page(State('', '', AnswerHistory(), True, ''), str(7 * (2 ** 127 - 1))).state.result,
+             '7 × (' + format_answer(2 ** 127 - 1) + ', not factored in time)')
+assert_equal(prime_page(State('', '', AnswerHistory(), True, ''), str(2 ** 521 - 1)).state.result,
+             format_answer(2 ** 521 - 1) + ' is unknown, timed out')
+assert_equal(factor_page(State('', '', AnswerHistory(), True, ''), str(7 * (2 ** 521 - 1))).state.result,
+             '7 × (' + format_answer(2 ** 521 - 1) + ', not factored in time)')
+NUMBER_THEORY_SECONDS = 2
+if workers_available():
+    assert_equal(calculate('+', '1' * 30000, '2' * 30000), '33333333333333333333...33333333333333333333 (30,000 digits)')
+    POWER_TIMEOUT_SECONDS = 0
+    assert_equal(modular_power_page(State('', '', AnswerHistory(), True, ''), '7' * 5000, '9' * 5000, '8' * 5000).content[0],
+                 too_large(State('', '', AnswerHistory(), True, '')).content[0])
+    POWER_TIMEOUT_SECONDS = 10
+    assert_equal(gcd_page(State('', '', AnswerHistory(), True, ''), '6' * 30000, '4' * 30000).state.result,
+                 '22222222222222222222...22222222222222222222 (30,000 digits)')
+    power_preview = calculate('**', '9', '200000')
+    assert_equal(isinstance(full_answers[power_preview], LongAnswer), True)
+    assert_equal(full_answer(State('', '', AnswerHistory(), True, ''), power_preview, 0).content[1],
+                 int_to_decimal(9 ** 200000)[:ANSWER_PART_DIGITS])
+    assert_equal(full_answers[power_preview], int_to_decimal(9 ** 200000))
+    assert_equal(calculate_expression('(9 ** 20000) % (3 ** 20000) + 1'), 1)
+    assert_equal(calculate_expression('(9 ** 20000) * 2'), preview_answer(9 ** 20000 * 2))
+    POWER_TIMEOUT_SECONDS = 0
+    assert_equal(calculate_expression('(9 ** 2000000) % (3 ** 2000000)'), None)
+    POWER_TIMEOUT_SECONDS = 10
+
+assert_equal([factorial(number) for number in [0, 1, 5, 20]], [1, 1, 120, 2432902008176640000])
+assert_equal(combinations(5000, 2500), math.comb(5000, 2500))
+assert_equal(combinations(10, 3), 120)
+assert_equal(combinations(3, 10), 0)
+assert_equal(combinations(10 ** 12, 100), math.comb(10 ** 12, 100))
+assert_equal(combinations(100000, 500), math.comb(100000, 500))
+assert_equal(estimate_combinations_bits(10 ** 6, 500000) >= 10 ** 6, True)
+assert_equal(permutations(3000, 1000), math.perm(3000, 1000))
+assert_equal(permutations(10, 3), 720)
+assert_equal(primes_up_to(30), [2, 3, 5, 7, 11, 13, 17, 19, 23, 29])
+assert_equal(product_tree([2, 3, 5, 7, 11]), 2310)
+assert_equal(estimate_factorial_bits(100000) >= factorial(100000).bit_length(), True)
+assert_equal(estimate_combinations_bits(5000, 2500) >= combinations(5000, 2500).bit_length(), True)
+assert_equal(compute_factorial(10 ** 30), None)
+assert_equal(compute_combinations(10 ** 30, 10 ** 15), None)
+assert_equal(compute_permutations(10 ** 100, 2), 10 ** 200 - 10 ** 100)
+
+assert_equal(
+ factorial_page(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''), '5'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([120]), valid_input=True, result='120'),
+     content=['The answer is: 120',
+              Button(text='View Answer History', url='/get_history'),
+              Button(text='Restart here', url='/')]))
+
+assert_equal(combinations_page(State('', '', AnswerHistory(), True, ''), '52', '5').state.result, '2598960')
+assert_equal(permutations_page(State('', '', AnswerHistory(), True, ''), '10', '3').state.result, '720')
+assert_equal(factorial_page(State('', '', AnswerHistory(), True, ''), '99999999999').content[0],
+             'Result too large! That answer has too many digits to compute. Try smaller numbers.')
+
+history_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_DIRECTORY, 'test-history')
+for extension in ['.log', '.idx']:
+    if os.path.exists(history_folder + extension):
+        os.remove(history_folder + extension)
+saved_history = AnswerHistory([4, 0.5, 'undefined', '2^3 × 3'], capacity=3, log=HistoryLog(history_folder))
+assert_equal(saved_history, AnswerHistory([0.5, 'undefined', '2^3 × 3']))
+assert_equal(saved_history.slots, [])
+assert_equal(saved_history.page(1, 2), [HistoryRecord('', (), '2^3 × 3')])
+assert_equal(saved_history[0].result, 0.5)
+with io.open(history_folder + '.log', 'ab') as torn_log:
+    torn_log.write(b'77\n12')
+assert_equal(AnswerHistory(capacity=10, log=HistoryLog(history_folder)), AnswerHistory([4, 0.5, 'undefined', '2^3 × 3', 77]))
+assert_equal(os.path.getsize(history_folder + '.idx'), 5 * HISTORY_INDEX_BYTES)
+with io.open(history_folder + '.idx', 'ab') as torn_index:
+    torn_index.write(b'\xff\xff\xff')
+assert_equal(len(HistoryLog(history_folder)), 5)
+assert_equal(HistoryLog(history_folder).read(3, 5), [['', [], '2^3 × 3', saved_history[2].timestamp], 77])
+assert_equal(AnswerHistory([float('nan'), 1, 2, 3], capacity=2, log=HistoryLog(history_folder)), AnswerHistory([2, 3]))
+os.remove(history_folder + '.log')
+os.remove(history_folder + '.idx')
+
+durable_sessions = SessionStore(1, 1 << 20, 60, HISTORY_DIRECTORY)
+durable_session = durable_sessions.create()
+durable_session.answer_history.append(34)
+durable_sessions.create()
+assert_equal(durable_sessions.get(durable_session.session).answer_history, AnswerHistory([34]))
+assert_equal(durable_sessions.new_history('../escape').log, None)
+assert_equal(durable_sessions.new_history('made-up').log, None)
+assert_equal(durable_sessions.new_history(durable_session.session[:-1] + 'x').log, None)
+durable_path = os.path.join(durable_sessions.folder(), durable_session.session.partition('.')[0])
+durable_sessions.sessions.clear()
+os.utime(durable_path + '.log', (0, 0))
+durable_sessions.clean_up()
+assert_equal([os.path.exists(durable_path + '.log'), os.path.exists(durable_path + '.idx')], [False, False])
+assert_equal(durable_sessions.get(durable_session.session).answer_history, AnswerHistory())
+
+record_history = AnswerHistory(capacity=4)
+record_history.append(9, '+', ('4', '5'))
+record_history.append(1156, '**', ('34', '2'))
+record_history.append(0.2, '/', ('3', '15'))
+record_history.append('97 is prime', 'prime', ('97',))
+assert_equal(record_history[1], HistoryRecord('**', ('34', '2'), 1156))
+assert_equal(record_history[1].describe(), '34 ** 2 = 1156')
+assert_equal(record_history.find(operator='**'), [HistoryRecord('**', ('34', '2'), 1156)])
+assert_equal(record_history.find(result=result_key(' 0.2 ')), [HistoryRecord('/', ('3', '15'), 0.2)])
+assert_equal(record_history.statistics(), {'count': 3, 'total': 1165.2, 'smallest': 0.2, 'largest': 1156, 'average': 388.40000000000003})
+record_history.append(7, '+', ('3', '4'))
+record_history.append(2, '-', ('9', '7'))
+assert_equal(record_history.find(operator='+'), [HistoryRecord('+', ('3', '4'), 7)])
+assert_equal(record_history.find(operator='**'), [])
+assert_equal(record_history.statistics(), {'count': 3, 'total': 9.2, 'smallest': 0.2, 'largest': 7, 'average': 3.0666666666666664})
+assert_equal(list(record_history.by_result), [0.2, '97 is prime', 7, 2])
+assert_equal(AnswerHistory([5, 6, 5]).by_result, {5: collections.deque([0, 2]), 6: 1})
+assert_equal(AnswerHistory([5, 6, 5, 7], capacity=3).by_result, {6: 1, 5: 2, 7: 3})
+assert_equal(repr(AnswerHistory([0.1, 0.2, 1156, 3], capacity=2).statistics()['total']), '1159')
+assert_equal(len(AnswerHistory([float('nan'), 4, float('nan')]).find(result=float('nan'))), 2)
+assert_equal(AnswerHistory([5, 5]).nbytes() > AnswerHistory([5, 6]).nbytes(), True)
+assert_equal(HistoryRecord('!', ('5',), 120).describe(), '5! = 120')
+assert_equal(HistoryRecord('gcd', ('34', '51'), 17).describe(), 'gcd(34, 51) = 17')
+huge_history = AnswerHistory([10 ** 400, 0.5, 10 ** 400])
+assert_equal([huge_history.statistics()['total'], huge_history.statistics()['average']], [2 * 10 ** 400, 2 * 10 ** 400 // 3])
+assert_equal([is_number(10 ** 400), is_number(float('inf')), is_number(True), is_number('9')], [True, False, False, False])
+assert_equal(short_operand('7' * 1001), '7' * 20 + '...' + '7' * 20 + ' (1,001 digits)')
+
+assert_equal(
+ history_stats(State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, '2^3']), valid_input=True, result='2^3')),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9, 1, '2^3']), valid_input=True, result='2^3'),
+     content=['Answers that are numbers: 2',
+              'Total: 10',
+              'Smallest: 1',
+              'Largest: 9',
+              'Average: 5.0',
+              'Search by operator, such as ** or gcd',
+              TextBox(name='operator', kind='text', default_value=''),
+              'or by answer',
+              TextBox(name='answer', kind='text', default_value=''),
+              Button(text='Search History', url='/search_history'),
+              Button(text='Restart here', url='/')]))
+
+searched_state = State('', '', AnswerHistory(), True, '')
+exponent_page(searched_state, '34', '2')
+add_page(searched_state, '1000', '156')
+assert_equal(search_history(searched_state, '**', '').content,
+             ['Found 1 matching answers', '34 ** 2 = 1156',
+              Button(text='History Statistics', url='/history_stats'),
+              Button(text='Restart here', url='/')])
+assert_equal(search_history(searched_state, '', '1156').content[:3], ['Found 2 matching answers', '34 ** 2 = 1156', '1000 + 156 = 1156'])
+
+assert_equal(render_button('Next Page', 'get_history', (('page', 1), ('session', 'a b'))),
+             '<button type="submit" formaction="/get_history?page=1&amp;session=a+b">Next Page</button>')
+assert_equal(render_component(Button('Restart here', index)), '<button type="submit" formaction="/">Restart here</button>')
+assert_equal(render_component(TextBox('first', '<4>')), '<p><input type="text" name="first" value="&lt;4&gt;"></p>')
+assert_equal(render_component('1 < 2'), '<p>1 &lt; 2</p>')
+assert_equal([is_heavy('add_page', {'first': '4', 'second': '5'}), is_heavy('exponent_page', {'first': '9', 'second': '99'}),
+              is_heavy('exponent_page', {'first': '9', 'second': '99999'}), is_heavy('add_page', {'first': '7' * 3000, 'second': '5'}),
+              is_heavy('factor_page', {'first': '8'})],
+             [False, False, True, True, True])
+
+
+async def check_server():
+    sessions.directory = ''
+    server = CalculatorServer(State('', '', AnswerHistory(), True, '', shared=True), workers=1, queue_limit=0)
+    status, headers, body = await server.respond('POST', '/add_page', {}, b'first=4&second=5')
+    assert_equal((status, b'The answer is: 9' in body), (200, True))
+    assert_equal((await server.respond('GET', '/nowhere', {}, b''))[0], 404)
+    assert_equal((await server.respond('GET', '/get_history?page=two', {}, b''))[0], 400)
+    assert_equal((await server.respond('GET', '/metrics', {}, b''))[0], 200)
+    heavy = asyncio.ensure_future(server.respond('POST', '/factor_page', {}, b'first=72'))
+    await asyncio.sleep(0)
+    assert_equal((await server.respond('POST', '/factor_page', {}, b'first=8'))[0], 503)
+    assert_equal((await heavy)[0], 200)
+    server.executor.shutdown()
+    server.cheap_executor.shutdown()
+    sessions.directory = HISTORY_DIRECTORY
+
+asyncio.run(check_server())
+
+assert_equal([divide_significant('1', '3', 5), divide_significant('1', '4', 10), divide_significant('22', '7', 3),
+               divide_significant('1000', '1', 10), divide_significant('1000', '1', 2), divide_significant('0', '7', 3),
+               divide_significant('1', '8000000', 4), divide_significant('10' + '0' * 30, '3', 4)],
+              ['0.33333...', '0.25', '3.14...', '1000', '1 × 10^3', '0', '1.25 × 10^-7', '3.333... × 10^30'])
+assert_equal(divide_significant('3' * 1000000, '7' * 999999 + '1', 12), '0.428571428571...')
+assert_equal(divide_significant('8' * 1000000, '3' * 999999 + '1', 8), '2.6666666...')
+assert_equal(divide_significant('24' * 500, '12' * 500, 4), '2')
+assert_equal(divide_significant('1' * 50, '7' * 40, 30), str(decimal.Context(prec=30, rounding=decimal.ROUND_DOWN).divide(decimal.Decimal('1' * 50), decimal.Decimal('7' * 40))) + '...')
+assert_equal(exact_fraction(34, 102), (1, 3))
+
+assert_equal(
+ exact_division_page(State(first_digit='', second_digit='', answer_history=AnswerHistory(), valid_input=True, result=''), '34', '102', ''),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory(['1/3']), valid_input=True, result='1/3'),
+     content=['The answer is: 1/3',
+              Button(text='View Answer History', url='/get_history'),
+              Button(text='Restart here', url='/')]))
+assert_equal(exact_division_page(State('', '', AnswerHistory(), True, ''), '1', '7', '12').state.result, '0.142857142857...')
+assert_equal(exact_division_page(State('', '', AnswerHistory(), True, ''), '1', '7', '0').state.valid_input, False)
+
+assert_equal(
+ division_page(State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'), '3', '00'),
+ Page(state=State(first_digit='', second_digit='', answer_history=AnswerHistory([9]), valid_input=True, result='9'),
+     content=["Undefined! You can't divide by zero, or take the modulo by zero. Try Again.",
+              Image(url=site_assets.assets['error.png'].url, width=site_assets.assets['error.png'].width,
+                    height=site_assets.assets['error.png'].height),
+              Button(text='Retry', url='/')]))
+assert_equal(modulo_page(State('', '', AnswerHistory(), True, ''), '3', '0').content[0][:10], 'Undefined!')
+assert_equal(expression_page(State('', '', AnswerHistory(), True, ''), '4 / (2 - 2)').content[0][:10], 'Undefined!')
+assert_equal(modular_power_page(State('', '', AnswerHistory(), True, ''), '4', '2', '0').content[0][:10], 'Undefined!')
+
+load_summary = summarize_step(2, [(200, 0.001), (304, 0.002), (503, 0.003), (0, 0.5)], 2.0, [1 << 20])
+assert_equal([load_summary['requests'], load_summary['throughput_per_second'], load_summary['error_rate'],
+              load_summary['busy_rate'], load_summary['p50_seconds'], load_summary['max_seconds']],
+             [4, 2.0, 0.5, 0.25, 0.002, 0.5])
+assert_equal(summarize_step(1, [], 1.0, [])['p99_seconds'], 0.0)
+assert_equal(process_rss(-1), None)